@@ -7,13 +7,115 @@ Automatically detects available compilers and builds the library
 on Windows, Linux, and macOS.
 """
 
+import io
 import os
+import re
 import sys
+import json
+import mmap
+import shlex
+import shutil
+import hashlib
 import platform
 import subprocess
 import argparse
+import asyncio
+import functools
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing.connection import Client, Listener
 from pathlib import Path
 
+# Files at least this large are hashed through mmap instead of read()
+MMAP_THRESHOLD = 1 << 20
+
+# Diagnostic lines worth echoing from a failed command's logs
+ERROR_LINE_RE = re.compile(rb"(?:error|fatal error)[: ]|undefined reference")
+
+# Results of compiler --version probes, shared between projects
+PROBE_CACHE_FILE = (
+    Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+    / "badcpplib"
+    / "compiler_probe.json"
+)
+
+
+@functools.lru_cache(maxsize=None)
+def supports_flag(compiler, flag):
+    """Check once whether a GCC-style compiler accepts a flag"""
+    probe = [compiler, "-Werror", flag, "-x", "c++", "-c", "-", "-o", os.devnull]
+    try:
+        result = subprocess.run(
+            probe,
+            input=b"int x;\n",
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            timeout=30,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+    return result.returncode == 0
+
+
+@functools.lru_cache(maxsize=None)
+def llvm_archiver(compiler):
+    """Find an llvm-ar that can index Clang bitcode, or None"""
+    archiver = shutil.which("llvm-ar")
+    if archiver:
+        return archiver
+    # Distributions often install only llvm-ar-NN next to clang++-NN
+    try:
+        result = subprocess.run(
+            [compiler, "-print-prog-name=llvm-ar"],
+            capture_output=True,
+            text=True,
+            timeout=30,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    name = result.stdout.strip()
+    if result.returncode != 0 or not name:
+        return None
+    # Clang echoes the bare name back when it finds no such program
+    return name if os.path.isabs(name) and os.path.isfile(name) else shutil.which(name)
+
+
+@functools.lru_cache(maxsize=None)
+def lto_flag(compiler):
+    """Link-time optimization flag, or None without a matching archiver"""
+    if compiler == "clang++":
+        # ThinLTO objects are bitcode, which only llvm-ar can index
+        if llvm_archiver(compiler) and supports_flag(compiler, "-flto=thin"):
+            return "-flto=thin"
+        return None
+    # GCC LTO objects are only indexed through gcc-ar's linker plugin
+    if shutil.which("gcc-ar") and supports_flag(compiler, "-flto=auto"):
+        return "-flto=auto"
+    return None
+
+
+@functools.lru_cache(maxsize=None)
+def compile_flags(compiler, build_type, include_dir):
+    """Get compilation flags for each compiler as an immutable tuple"""
+    if compiler == "cl":  # MSVC
+        base_flags = ["/std:c++17", "/EHsc", f"/I{include_dir}"]
+        if build_type == "debug":
+            base_flags.extend(["/Od", "/Zi", "/FS", "/MDd"])
+        else:
+            base_flags.extend(["/O2", "/MD", "/GL"])
+    else:  # GCC or Clang
+        base_flags = ["-std=c++17", "-Wall", "-Wextra", f"-I{include_dir}"]
+        if build_type == "debug":
+            base_flags.extend(["-g", "-O0", "-DDEBUG"])
+        else:
+            base_flags.extend(["-O2", "-DNDEBUG"])
+            # Link-time optimization across translation units
+            lto = lto_flag(compiler)
+            if lto:
+                base_flags.append(lto)
+
+    return tuple(base_flags)
+
 
 class Colors:
     """ANSI colors for pretty output"""
@@ -28,6 +130,25 @@ class Colors:
     BOLD = "\033[1m"
     UNDERLINE = "\033[4m"
 
+    _initialized = False
+
+    @classmethod
+    def ensure_initialized(cls, system):
+        """Configure colors for the platform, once per process"""
+        if cls._initialized:
+            return
+        cls._initialized = True
+
+        # Configure colors for Windows
+        if system == "Windows" and not os.environ.get("FORCE_COLOR"):
+            try:
+                # Attempt to enable ANSI colors on Windows 10+
+                import colorama
+
+                colorama.init()
+            except ImportError:
+                cls.disable()
+
     @staticmethod
     def disable():
         """Disable colors on Windows if not supported"""
@@ -49,7 +170,7 @@ class BuildSystem:
         self.system = platform.system()
 
         # Determine project root directory (parent directory of scripts)
-        script_dir = Path(__file__).parent
+        script_dir = Path(__file__).resolve().parent
         self.project_root = script_dir.parent
 
         # Paths to directories
@@ -58,35 +179,37 @@ class BuildSystem:
         self.examples_dir = self.project_root / "examples"
         self.tests_dir = self.project_root / "tests"
         self.build_dir = self.project_root / "build"
+        self.cache_file = self.build_dir / "cache-db.json"
+        # Tests that may run concurrently, one name per line
+        self.parallel_tests_file = self.tests_dir / "parallel_tests.txt"
 
-        # Create build directory if it doesn't exist
-        self.build_dir.mkdir(exist_ok=True)
+        # Compile several sources per compiler process to amortize startup
+        self.batch_compile = True
 
-        # Change to project root directory for build
-        os.chdir(self.project_root)
+        # State kept in memory across builds of a long-lived instance
+        self._compilers = None
+        self._cache = None
+        self._cache_mtime = None
 
-        self.sources = ["src/badcpplib.cpp", "src/pch.cpp"]
-        self.headers = [
-            "include/badcpplib.hpp",
-            "include/framework.hpp",
-            "include/pch.hpp",
-        ]
-        self.example_source = "examples/example.cpp"
+        # Compiler cache wrapper; ccache only understands GCC-style compilers
+        self.cc_wrapper = shutil.which("sccache") or shutil.which("ccache")
 
-        # Configure colors for Windows
-        if self.system == "Windows" and not os.environ.get("FORCE_COLOR"):
-            try:
-                # Attempt to enable ANSI colors on Windows 10+
-                import colorama
+        # Create build directory if it doesn't exist
+        self.build_dir.mkdir(exist_ok=True)
 
-                colorama.init()
-            except ImportError:
-                Colors.disable()
+        # Absolute paths, so builds do not depend on the working directory
+        self.sources = [self.src_dir / "badcpplib.cpp", self.src_dir / "pch.cpp"]
+        self.pch_header = self.include_dir / "pch.hpp"
+        self.example_source = self.examples_dir / "example.cpp"
 
         # Define executable extensions
         self.exe_ext = ".exe" if self.system == "Windows" else ""
         self.lib_ext = ".lib" if self.system == "Windows" else ".a"
 
+        # Output paths, computed once
+        self.lib_path = self.build_dir / f"libbadcpp{self.lib_ext}"
+        self.example_exe = self.build_dir / f"example{self.exe_ext}"
+
     def print_header(self, text):
         """Print header"""
         print(f"\n{Colors.BOLD}{Colors.HEADER}{'='*50}")
@@ -119,93 +242,631 @@ class BuildSystem:
         except (subprocess.TimeoutExpired, FileNotFoundError, OSError):
             return False
 
+    def _load_probe_cache(self, path_hash):
+        """Load cached compiler probe results for the current PATH"""
+        try:
+            with open(PROBE_CACHE_FILE, "r") as f:
+                return json.load(f).get(path_hash, {})
+        except (OSError, ValueError, AttributeError):
+            return {}
+
+    def _save_probe_cache(self, path_hash, probes):
+        """Save compiler probe results for the current PATH"""
+        try:
+            PROBE_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+            with open(PROBE_CACHE_FILE, "w") as f:
+                json.dump({path_hash: probes}, f, indent=2)
+        except OSError:
+            pass
+
     def find_compilers(self):
         """Find available compilers"""
-        compilers = []
+        if self._compilers is not None:
+            return list(self._compilers)
 
         # List of compilers to check
         candidates = ["g++", "clang++", "cl"]
 
-        for compiler in candidates:
-            if self.check_compiler(compiler):
+        # Compilers missing from PATH need no --version probe
+        locations = {compiler: shutil.which(compiler) for compiler in candidates}
+        present = [compiler for compiler in candidates if locations[compiler]]
+
+        # Reuse successful probes while PATH and the resolved executables
+        # match; failures (timeouts, broken installs) are always probed again
+        path_hash = hashlib.md5(os.environ.get("PATH", "").encode()).hexdigest()
+        cached = self._load_probe_cache(path_hash)
+        probes = {
+            compiler: cached[compiler]
+            for compiler in present
+            if compiler in cached
+            and cached[compiler].get("ok")
+            and cached[compiler]["path"] == locations[compiler]
+        }
+
+        to_probe = [compiler for compiler in present if compiler not in probes]
+        if to_probe:
+            with ThreadPoolExecutor(max_workers=len(to_probe)) as executor:
+                results = executor.map(self.check_compiler, to_probe)
+                for compiler, ok in zip(to_probe, results):
+                    probes[compiler] = {"path": locations[compiler], "ok": ok}
+            self._save_probe_cache(
+                path_hash,
+                {compiler: probe for compiler, probe in probes.items() if probe["ok"]},
+            )
+
+        compilers = []
+        for compiler in present:
+            if probes[compiler]["ok"]:
                 compilers.append(compiler)
                 self.print_success(f"Found compiler: {compiler}")
 
-        return compilers
+        if self.cc_wrapper:
+            self.print_info(f"Compiler cache enabled: {self.cc_wrapper}")
 
-    def get_compile_flags(self, compiler, build_type="release"):
-        """Get compilation flags for each compiler"""
-        base_flags = []
+        self._compilers = compilers
+        return list(compilers)
 
-        if compiler == "cl":  # MSVC
-            base_flags = ["/std:c++17", "/EHsc", f"/I{self.include_dir}"]
-            if build_type == "debug":
-                base_flags.extend(["/Od", "/Zi", "/MDd"])
-            else:
-                base_flags.extend(["/O2", "/MD"])
-        else:  # GCC or Clang
-            base_flags = ["-std=c++17", "-Wall", "-Wextra", f"-I{self.include_dir}"]
-            if build_type == "debug":
-                base_flags.extend(["-g", "-O0", "-DDEBUG"])
+    def get_compile_flags(self, compiler, build_type="release"):
+        """Get compilation flags for each compiler (cached, as a tuple)"""
+        return compile_flags(compiler, build_type, str(self.include_dir))
+
+    def _hash_file(self, path):
+        """Return SHA-256 hex digest of file contents"""
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size >= MMAP_THRESHOLD:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    digest.update(data)
             else:
-                base_flags.extend(["-O2", "-DNDEBUG"])
+                digest.update(f.read())
+        return digest.hexdigest()
 
-        return base_flags
+    def _list_build_dir(self):
+        """Map file names in the build directory to their entries (one scan)"""
+        try:
+            with os.scandir(self.build_dir) as entries:
+                return {entry.name: entry for entry in entries if entry.is_file()}
+        except OSError:
+            return {}
 
-    def compile_library(self, compiler, build_type="release"):
-        """Compile static library"""
-        self.print_info(f"Compiling library with {compiler} ({build_type})")
+    def _load_cache(self):
+        """Load build cache database, reusing the in-memory copy if current"""
+        try:
+            mtime = os.stat(self.cache_file).st_mtime_ns
+        except OSError:
+            return {}
+        if self._cache is not None and self._cache_mtime == mtime:
+            return self._cache
 
-        # Compile object files
-        obj_files = []
-        flags = self.get_compile_flags(compiler, build_type)
+        try:
+            with open(self.cache_file, "r") as f:
+                self._cache = json.load(f)
+            self._cache_mtime = mtime
+            return self._cache
+        except (OSError, ValueError):
+            return {}
+
+    def _save_cache(self, cache):
+        """Save build cache database"""
+        try:
+            with open(self.cache_file, "w") as f:
+                json.dump(cache, f, indent=2, sort_keys=True)
+            self._cache = cache
+            self._cache_mtime = os.stat(self.cache_file).st_mtime_ns
+        except OSError as e:
+            self.print_warning(f"Could not save build cache: {e}")
+
+    def _file_digest(self, path, cache):
+        """Return a file's content hash, rehashing only if mtime or size changed
+
+        Stamps are kept in the cache database as
+        {"files": {path: {"mtime_ns": ..., "size": ..., "hash": ...}}}.
+        """
+        stamps = cache.setdefault("files", {})
+        st = os.stat(path)
+        stamp = stamps.get(str(path))
+        if (
+            stamp
+            and stamp["mtime_ns"] == st.st_mtime_ns
+            and stamp["size"] == st.st_size
+        ):
+            return stamp["hash"]
+
+        digest = self._hash_file(path)
+        stamps[str(path)] = {
+            "mtime_ns": st.st_mtime_ns,
+            "size": st.st_size,
+            "hash": digest,
+        }
+        return digest
+
+    def _source_key(self, source, headers, flags, compiler, cache):
+        """Cache key of a source: its contents, headers, compiler and flags"""
+        digest = hashlib.sha256()
+        digest.update(self._file_digest(source, cache).encode())
+        digest.update(b"||")
+        for header in headers:
+            digest.update(self._file_digest(header, cache).encode())
+        digest.update(b"||")
+        digest.update("\0".join([compiler] + flags).encode())
+        return digest.hexdigest()
+
+    def _dep_file(self, compiler, source):
+        """Path of the dependency file the compiler emits for a source"""
+        if compiler == "cl":
+            # /sourceDependencies <dir> names files after the full source name
+            return self.build_dir / f"{source.name}.json"
+        return self.build_dir / source.with_suffix(".d").name
 
-        for source in self.sources:
-            if not Path(source).exists():
-                self.print_error(f"Source file not found: {source}")
+    def _parse_dep_file(self, compiler, source):
+        """Return the headers listed in a source's dependency file"""
+        return self._read_dep_file(compiler, self._dep_file(compiler, source))
+
+    def _read_dep_file(self, compiler, dep_file):
+        """Return the headers listed in a dependency file"""
+        try:
+            if compiler == "cl":
+                with open(dep_file, "r") as f:
+                    return sorted(json.load(f)["Data"]["Includes"])
+
+            # Make-style rule: "obj: source header1 header2 \\\n header3 ..."
+            text = dep_file.read_text().replace("\\\n", " ")
+            _, _, deps = text.partition(": ")
+            deps = [
+                dep.replace("\\ ", " ")
+                for dep in re.split(r"(?<!\\)\s+", deps)
+                if dep
+            ]
+            return sorted(set(deps[1:]))
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _pch_file(self, compiler):
+        """Path of the precompiled header, or None if unsupported"""
+        if compiler == "cl":
+            return None
+        suffix = ".pch" if compiler == "clang++" else ".gch"
+        return self.build_dir / f"{self.pch_header.name}{suffix}"
+
+    def _pch_flags(self, compiler):
+        """Flags force-including the precompiled header"""
+        pch_file = self._pch_file(compiler)
+        if pch_file is None or not pch_file.exists():
+            return []
+        if compiler == "clang++":
+            return ["-include-pch", str(pch_file)]
+        # GCC uses build/pch.hpp.gch when including build/pch.hpp, and falls
+        # back to that forwarding stub if the precompiled header is unusable
+        return ["-Winvalid-pch", "-include", str(pch_file.with_suffix(""))]
+
+    def _build_pch(self, compiler, flags):
+        """Precompile include/pch.hpp unless it is up to date"""
+        pch_file = self._pch_file(compiler)
+        if pch_file is None:
+            return True
+
+        # Same cache scheme as library sources, keyed on the header path
+        cache = self._load_cache()
+        entry = cache.get(str(self.pch_header))
+        if isinstance(entry, dict) and pch_file.exists():
+            try:
+                key = self._source_key(
+                    self.pch_header, entry["headers"], flags, compiler, cache
+                )
+            except (OSError, KeyError):
+                key = None
+            if key == entry.get("hash"):
+                return True
+
+        if compiler != "clang++":
+            stub = pch_file.with_suffix("")
+            stub.write_text(f'#include "{self.pch_header}"\n')
+
+        self.print_info(f"Precompiling {self.pch_header}")
+
+        dep_file = pch_file.with_suffix(".d")
+        cmd = (
+            self._compiler_command(compiler)
+            + flags
+            + ["-x", "c++-header", str(self.pch_header)]
+            + ["-MMD", "-MF", str(dep_file), "-o", str(pch_file)]
+        )
+
+        try:
+            log_path = pch_file.with_suffix("")
+            if self._run_logged(cmd, log_path) != 0:
+                self.print_error("Error precompiling header:")
+                self._print_errors(log_path)
+                return False
+        except Exception as e:
+            self.print_error(f"Error precompiling header: {e}")
+            return False
+
+        headers = self._read_dep_file(compiler, dep_file)
+        if headers is None:
+            cache.pop(str(self.pch_header), None)
+        else:
+            cache[str(self.pch_header)] = {
+                "headers": headers,
+                "hash": self._source_key(
+                    self.pch_header, headers, flags, compiler, cache
+                ),
+            }
+        self._save_cache(cache)
+        return True
+
+    def _test_dep_file(self, compiler, test_file):
+        """Path of the dependency file the compiler emits for a test"""
+        suffix = ".test.json" if compiler == "cl" else ".test.d"
+        return self.build_dir / f"{test_file.stem}{suffix}"
+
+    def _test_key(self, test_file, headers, flags, compiler, lib_name, cache):
+        """Cache key of a test: contents, headers, library mtime, compiler, flags"""
+        digest = hashlib.sha256()
+        digest.update(self._file_digest(test_file, cache).encode())
+        digest.update(b"||")
+        for header in headers:
+            digest.update(self._file_digest(header, cache).encode())
+        digest.update(b"||")
+        digest.update(str(lib_name.stat().st_mtime_ns).encode())
+        digest.update(b"||")
+        digest.update("\0".join([compiler] + flags).encode())
+        return digest.hexdigest()
+
+    async def _run(self, cmd, semaphore, log_path, cwd=None):
+        """Run a command once a slot is free, writing its output to log files"""
+        async with semaphore:
+            with open(f"{log_path}.out", "wb") as out, open(
+                f"{log_path}.err", "wb"
+            ) as err:
+                try:
+                    proc = await asyncio.create_subprocess_exec(
+                        *cmd, stdout=out, stderr=err, cwd=cwd
+                    )
+                except OSError as e:
+                    err.write(f"Error running {cmd[0]}: {e}\n".encode())
+                    return -1
+
+                try:
+                    return await proc.wait()
+                except asyncio.CancelledError:
+                    try:
+                        proc.kill()
+                    except ProcessLookupError:
+                        pass
+                    await proc.wait()
+                    raise
+
+    def _run_logged(self, cmd, log_path, cwd=None):
+        """Run a command synchronously, writing its output to log files"""
+        with open(f"{log_path}.out", "wb") as out, open(
+            f"{log_path}.err", "wb"
+        ) as err:
+            return subprocess.run(cmd, stdout=out, stderr=err, cwd=cwd).returncode
+
+    def _print_errors(self, log_path):
+        """Print only the error lines of a failed command's logs"""
+        matched = False
+        # cl reports diagnostics on stdout, GCC and Clang on stderr. Matches
+        # go to sys.stdout, which the build daemon forwards to its client
+        for stream in ("out", "err"):
+            try:
+                with open(f"{log_path}.{stream}", "rb") as f:
+                    for line in f:
+                        if ERROR_LINE_RE.search(line):
+                            sys.stdout.write(line.decode(errors="replace"))
+                            matched = True
+            except OSError:
+                pass
+        sys.stdout.flush()
+        if not matched:
+            print(self._read_log(log_path))
+        self.print_info(f"Full log: {log_path}.err")
+
+    def _read_log(self, log_path, stream="err"):
+        """Read a command's logged stdout ("out") or stderr ("err")"""
+        try:
+            return Path(f"{log_path}.{stream}").read_text(errors="replace")
+        except OSError:
+            return ""
+
+    def _run_commands(self, commands, on_result, jobs=None):
+        """Run (cmd, cwd, log_path) commands concurrently, one per CPU core
+
+        Output goes to log_path.out/.err instead of being buffered in memory.
+        on_result(index, returncode, log_path) is called as each command
+        finishes; returning False cancels the remaining commands. jobs caps
+        the number of commands running at once.
+        """
+
+        async def run_all():
+            semaphore = asyncio.Semaphore(jobs or os.cpu_count() or 1)
+
+            async def run_indexed(index, cmd, cwd, log_path):
+                returncode = await self._run(cmd, semaphore, log_path, cwd)
+                return index, returncode, log_path
+
+            tasks = [
+                asyncio.ensure_future(run_indexed(index, cmd, cwd, log_path))
+                for index, (cmd, cwd, log_path) in enumerate(commands)
+            ]
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    if not on_result(*await next_done):
+                        return False
+                return True
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+        return asyncio.run(run_all())
+
+    def _can_use_make(self, commands):
+        """Check whether commands can be handed to make as one parallel job"""
+        return (
+            len(commands) > 1
+            and platform.system() != "Windows"
+            and shutil.which("make") is not None
+        )
+
+    def _run_make(self, commands, on_result):
+        """Run (cmd, cwd, log_path) commands as one `make -j` invocation
+
+        Each command becomes a phony target so freshness stays with the build
+        cache; make -k keeps going and the failed targets are parsed from its
+        error output. on_result has the same contract as in _run_commands.
+        """
+        targets = [f"job{index}" for index in range(len(commands))]
+        lines = [
+            "# Generated by build.py, do not edit",
+            f".PHONY: all {' '.join(targets)}",
+            f"all: {' '.join(targets)}",
+        ]
+        for target, (cmd, cwd, log_path) in zip(targets, commands):
+            recipe = shlex.join(cmd)
+            if cwd is not None:
+                recipe = f"cd {shlex.quote(str(cwd))} && {recipe}"
+            out = shlex.quote(f"{log_path}.out")
+            err = shlex.quote(f"{log_path}.err")
+            recipe = f"{recipe} > {out} 2> {err}".replace("$", "$$")
+            lines += ["", f"{target}:", f"\t{recipe}"]
+
+        makefile = self.build_dir / "tests.mk"
+        makefile.write_text("\n".join(lines) + "\n")
+        result = subprocess.run(
+            ["make", "-s", "-k", "-j", str(os.cpu_count() or 1), "-f", makefile.name],
+            cwd=self.build_dir,
+            capture_output=True,
+            text=True,
+        )
+        failed = set(re.findall(r"\[(?:[^\]]*: )?(job\d+)\] Error", result.stderr))
+        if result.returncode != 0 and not failed:
+            # make itself failed before running any recipe
+            print(result.stderr)
+            failed = set(targets)
+
+        for index, (target, (cmd, cwd, log_path)) in enumerate(zip(targets, commands)):
+            if not on_result(index, 1 if target in failed else 0, log_path):
                 return False
+        return True
+
+    def _compile_command(self, sources, flags, compiler):
+        """Build the (cmd, cwd, log_path) compiling sources into the build dir"""
+        log_path = self.build_dir / "-".join(source.stem for source in sources)
 
+        if len(sources) == 1:
+            source = sources[0]
             obj_file = (
                 self.build_dir
-                / Path(source).with_suffix(".obj" if compiler == "cl" else ".o").name
+                / source.with_suffix(".obj" if compiler == "cl" else ".o").name
             )
-            obj_files.append(str(obj_file))
 
             if compiler == "cl":
-                cmd = [compiler] + flags + ["/c", source, f"/Fo{obj_file}"]
+                cmd = (
+                    self._compiler_command(compiler)
+                    + flags
+                    + ["/sourceDependencies", str(self.build_dir)]
+                    + ["/c", str(source), f"/Fo{obj_file}"]
+                )
             else:
-                cmd = [compiler] + flags + ["-c", source, "-o", str(obj_file)]
+                dep_file = self._dep_file(compiler, source)
+                cmd = (
+                    self._compiler_command(compiler)
+                    + flags
+                    + ["-MMD", "-MF", str(dep_file)]
+                    + ["-c", str(source), "-o", str(obj_file)]
+                )
+            return cmd, None, log_path
+
+        paths = [str(source) for source in sources]
+
+        if compiler == "cl":
+            # cl /MP compiles the listed sources in parallel internally
+            cmd = (
+                self._compiler_command(compiler)
+                + flags
+                + [f"/MP{min(len(sources), os.cpu_count() or 1)}"]
+                + ["/sourceDependencies", str(self.build_dir)]
+                + ["/c"]
+                + paths
+                + [f"/Fo{self.build_dir}\\"]
+            )
+            return cmd, None, log_path
+
+        # -o cannot be combined with several -c inputs, so objects and
+        # depfiles are written to the build directory under their basenames
+        cmd = self._compiler_command(compiler) + flags + ["-MMD", "-c"] + paths
+        return cmd, self.build_dir, log_path
+
+    def _compiler_command(self, compiler):
+        """Compiler invocation prefix, routed through the cache wrapper if any"""
+        if self.cc_wrapper and (
+            compiler != "cl" or Path(self.cc_wrapper).stem == "sccache"
+        ):
+            return [self.cc_wrapper, compiler]
+        return [compiler]
+
+    def _plan_compile_jobs(self, compiler, dirty):
+        """Group dirty source indices into compiler invocations"""
+        # Compiler caches only handle one source per invocation
+        if (
+            not self.batch_compile
+            or len(dirty) == 1
+            or len(self._compiler_command(compiler)) > 1
+        ):
+            return [[index] for index in dirty]
+
+        if compiler == "cl":
+            return [dirty]
+
+        # One batch per worker keeps the cores busy while sharing startup cost
+        workers = min(len(dirty), os.cpu_count() or 1)
+        return [dirty[i::workers] for i in range(workers)]
+
+    def _archiver(self, compiler, build_type):
+        """Return the archiver for GCC/Clang, preferring the faster llvm-ar"""
+        if compiler == "g++" and build_type == "release":
+            # GCC LTO objects are only indexed through the linker plugin
+            return shutil.which("gcc-ar") or "ar"
+        if compiler == "clang++":
+            # Also finds a versioned llvm-ar, needed for ThinLTO bitcode
+            return llvm_archiver(compiler) or "ar"
+        return shutil.which("llvm-ar") or "ar"
+
+    def _is_thin_archive(self, lib_name):
+        """Check whether a static library is a thin archive"""
+        try:
+            with open(lib_name, "rb") as f:
+                return f.read(8) == b"!<thin>\n"
+        except OSError:
+            return False
+
+    def compile_library(self, compiler, build_type="release"):
+        """Compile static library"""
+        self.print_info(f"Compiling library with {compiler} ({build_type})")
+
+        source_exists = {source: source.is_file() for source in self.sources}
+        for source in self.sources:
+            if not source_exists[source]:
+                self.print_error(f"Source file not found: {source}")
+                return False
+
+        # Compile object files in parallel, keeping them in source order
+        flags = list(self.get_compile_flags(compiler, build_type))
+        if not self._build_pch(compiler, flags):
+            return False
+        pch_flags = self._pch_flags(compiler)
+        flags = pch_flags + flags
+        # Depfiles omit the precompiled header, so track it explicitly
+        pch_deps = [str(self._pch_file(compiler))] if pch_flags else []
+        obj_ext = ".obj" if compiler == "cl" else ".o"
+        obj_files = [
+            str(self.build_dir / source.with_suffix(obj_ext).name)
+            for source in self.sources
+        ]
 
+        # Skip sources whose object file exists and whose cache key, computed
+        # over the headers recorded from the previous compile, still matches
+        cache = self._load_cache()
+        built = self._list_build_dir()
+        dirty = []
+        for index, source in enumerate(self.sources):
+            entry = cache.get(str(source))
+            if not isinstance(entry, dict) or Path(obj_files[index]).name not in built:
+                dirty.append(index)
+                continue
             try:
-                result = subprocess.run(cmd, capture_output=True, text=True)
-                if result.returncode != 0:
-                    self.print_error(f"Compilation error {source}:")
-                    print(result.stderr)
+                key = self._source_key(
+                    source, entry["headers"], flags, compiler, cache
+                )
+            except (OSError, KeyError):
+                key = None
+            if key != entry.get("hash"):
+                dirty.append(index)
+
+        if len(dirty) < len(self.sources):
+            self.print_info(
+                f"Skipping {len(self.sources) - len(dirty)} unchanged source(s)"
+            )
+
+        try:
+            if dirty:
+                jobs = [
+                    [self.sources[index] for index in job]
+                    for job in self._plan_compile_jobs(compiler, dirty)
+                ]
+
+                def on_compiled(index, returncode, log_path):
+                    if returncode != 0:
+                        names = ", ".join(str(source) for source in jobs[index])
+                        self.print_error(f"Compilation error {names}:")
+                        self._print_errors(log_path)
+                        return False
+
+                    for source in jobs[index]:
+                        headers = self._parse_dep_file(compiler, source)
+                        if headers is None:
+                            cache.pop(str(source), None)
+                            continue
+                        headers = sorted(set(headers + pch_deps))
+                        cache[str(source)] = {
+                            "headers": headers,
+                            "hash": self._source_key(
+                                source, headers, flags, compiler, cache
+                            ),
+                        }
+                    return True
+
+                commands = [
+                    self._compile_command(job, flags, compiler) for job in jobs
+                ]
+                if not self._run_commands(commands, on_compiled):
                     return False
-            except Exception as e:
-                self.print_error(f"Error running compiler: {e}")
-                return False
+        finally:
+            # Objects stay pending until an archive step succeeds, so a
+            # failed or interrupted archive is redone on the next run
+            pending = set(cache.get("unarchived", []))
+            pending.update(obj_files[index] for index in dirty)
+            if pending:
+                cache["unarchived"] = sorted(pending)
+            self._save_cache(cache)
 
         # Create static library
-        lib_name = self.build_dir / f"libbadcpp{self.lib_ext}"
+        lib_name = self.lib_path
+        changed = [obj_file for obj_file in obj_files if obj_file in pending]
+
+        if lib_name.name in built and not changed:
+            self.print_success(f"Library up to date: {lib_name}")
+            return True
 
         if compiler == "cl":
-            # Use lib.exe for MSVC
-            cmd = ["lib", f"/OUT:{lib_name}"] + obj_files
+            # Use lib.exe for MSVC; /GL objects need link-time code generation
+            ltcg = ["/LTCG"] if build_type == "release" else []
+            cmd = ["lib"] + ltcg + [f"/OUT:{lib_name}"] + obj_files
+        elif self._is_thin_archive(lib_name):
+            # Members are references, so only replace the changed objects
+            archiver = self._archiver(compiler, build_type)
+            cmd = [archiver, "rcsT", str(lib_name)] + changed
         else:
-            # Use ar for GCC/Clang
-            cmd = ["ar", "rcs", str(lib_name)] + obj_files
+            # Thin archive: store references to the objects instead of copies
+            if lib_name.name in built:
+                lib_name.unlink()
+            archiver = self._archiver(compiler, build_type)
+            cmd = [archiver, "rcsT", str(lib_name)] + obj_files
 
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            if result.returncode != 0:
+            log_path = self.build_dir / lib_name.stem
+            if self._run_logged(cmd, log_path) != 0:
                 self.print_error("Error creating library:")
-                print(result.stderr)
+                self._print_errors(log_path)
                 return False
         except Exception as e:
             self.print_error(f"Error creating library: {e}")
             return False
 
+        cache.pop("unarchived", None)
+        self._save_cache(cache)
         self.print_success(f"Library created: {lib_name}")
         return True
 
@@ -213,28 +874,31 @@ class BuildSystem:
         """Compile example"""
         self.print_info(f"Compiling example with {compiler}")
 
-        exe_name = self.build_dir / f"example{self.exe_ext}"
-        flags = self.get_compile_flags(compiler, build_type)
+        exe_name = self.example_exe
+        flags = list(self.get_compile_flags(compiler, build_type))
+        if not self._build_pch(compiler, flags):
+            return False
+        flags = self._pch_flags(compiler) + flags
 
         if use_library:
             # Link with library
-            lib_name = self.build_dir / f"libbadcpp{self.lib_ext}"
+            lib_name = self.lib_path
             if not lib_name.exists():
                 self.print_error(f"Library not found: {lib_name}")
                 return False
 
             if compiler == "cl":
                 cmd = (
-                    [compiler]
+                    self._compiler_command(compiler)
                     + flags
-                    + [self.example_source, str(lib_name), f"/Fe{exe_name}"]
+                    + [str(self.example_source), str(lib_name), f"/Fe{exe_name}"]
                 )
             else:
                 cmd = (
-                    [compiler]
+                    self._compiler_command(compiler)
                     + flags
                     + [
-                        self.example_source,
+                        str(self.example_source),
                         f"-L{self.build_dir}",
                         "-lbadcpp",
                         "-o",
@@ -243,17 +907,18 @@ class BuildSystem:
                 )
         else:
             # Direct compilation
-            sources = [self.example_source] + self.sources
+            sources = [str(source) for source in [self.example_source] + self.sources]
+            compiler_cmd = self._compiler_command(compiler)
             if compiler == "cl":
-                cmd = [compiler] + flags + sources + [f"/Fe{exe_name}"]
+                cmd = compiler_cmd + flags + sources + [f"/Fe{exe_name}"]
             else:
-                cmd = [compiler] + flags + sources + ["-o", str(exe_name)]
+                cmd = compiler_cmd + flags + sources + ["-o", str(exe_name)]
 
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            if result.returncode != 0:
+            log_path = self.build_dir / exe_name.stem
+            if self._run_logged(cmd, log_path) != 0:
                 self.print_error("Error compiling example:")
-                print(result.stderr)
+                self._print_errors(log_path)
                 return False
         except Exception as e:
             self.print_error(f"Error compiling example: {e}")
@@ -263,7 +928,7 @@ class BuildSystem:
         return True
 
     def compile_tests(self, compiler, build_type="release"):
-        """Compile tests"""
+        """Compile tests, returning the test executables (False on error)"""
         if not self.tests_dir.exists():
             self.print_warning("Tests directory not found")
             return False
@@ -275,89 +940,170 @@ class BuildSystem:
 
         self.print_info(f"Compiling tests with {compiler}")
 
-        lib_name = self.build_dir / f"libbadcpp{self.lib_ext}"
+        lib_name = self.lib_path
         if not lib_name.exists():
             self.print_error(f"Library not found: {lib_name}")
             return False
 
-        flags = self.get_compile_flags(compiler, build_type)
+        flags = list(self.get_compile_flags(compiler, build_type))
 
+        # Skip tests whose cache key (over the headers recorded by the last
+        # compile) matches and whose executable exists
+        cache = self._load_cache()
+        built = self._list_build_dir()
+        dirty = []
         for test_file in test_files:
-            test_name = test_file.stem
-            exe_name = self.build_dir / f"{test_name}{self.exe_ext}"
-
-            if compiler == "cl":
-                cmd = (
-                    [compiler]
-                    + flags
-                    + [str(test_file), str(lib_name), f"/Fe{exe_name}"]
-                )
+            exe_name = self.build_dir / f"{test_file.stem}{self.exe_ext}"
+            entry = cache.get(str(test_file))
+            key = None
+            if isinstance(entry, dict):
+                try:
+                    key = self._test_key(
+                        test_file, entry["headers"], flags, compiler, lib_name, cache
+                    )
+                except (OSError, KeyError):
+                    key = None
+            if key is None or key != entry.get("hash") or exe_name.name not in built:
+                dirty.append(test_file)
             else:
-                cmd = (
-                    [compiler]
-                    + flags
-                    + [
-                        str(test_file),
-                        f"-L{self.build_dir}",
-                        "-lbadcpp",
-                        "-o",
-                        str(exe_name),
-                    ]
-                )
+                self.print_success(f"Test up to date: {exe_name}")
 
-            try:
-                result = subprocess.run(cmd, capture_output=True, text=True)
-                if result.returncode != 0:
-                    self.print_error(f"Error compiling test {test_name}:")
-                    print(result.stderr)
+        try:
+            if dirty:
+
+                def on_compiled(index, returncode, log_path):
+                    test_file = dirty[index]
+                    if returncode != 0:
+                        self.print_error(f"Error compiling test {test_file.stem}:")
+                        self._print_errors(log_path)
+                        return False
+
+                    headers = self._read_dep_file(
+                        compiler, self._test_dep_file(compiler, test_file)
+                    )
+                    if headers is None:
+                        cache.pop(str(test_file), None)
+                    else:
+                        cache[str(test_file)] = {
+                            "headers": headers,
+                            "hash": self._test_key(
+                                test_file, headers, flags, compiler, lib_name, cache
+                            ),
+                        }
+                    exe_name = self.build_dir / f"{test_file.stem}{self.exe_ext}"
+                    self.print_success(f"Test compiled: {exe_name}")
+                    return True
+
+                commands = [
+                    self._test_command(test_file, flags, compiler, lib_name)
+                    for test_file in dirty
+                ]
+                # Let make schedule the independent links where it is available;
+                # cl names one executable after all listed sources, so it can't
+                # link several tests in a single invocation
+                if compiler != "cl" and self._can_use_make(commands):
+                    run = self._run_make
+                else:
+                    run = self._run_commands
+                if not run(commands, on_compiled):
                     return False
-            except Exception as e:
-                self.print_error(f"Error compiling test {test_name}: {e}")
-                return False
+        finally:
+            self._save_cache(cache)
 
-            self.print_success(f"Test compiled: {exe_name}")
+        return [
+            self.build_dir / f"{test_file.stem}{self.exe_ext}"
+            for test_file in test_files
+        ]
 
-        return True
+    def _test_command(self, test_file, flags, compiler, lib_name):
+        """Build the (cmd, cwd, log_path) linking a test against the library"""
+        exe_name = self.build_dir / f"{test_file.stem}{self.exe_ext}"
+        log_path = self.build_dir / test_file.stem
+        dep_file = self._test_dep_file(compiler, test_file)
 
-    def run_tests(self):
-        """Run tests"""
-        test_files = list(self.build_dir.glob(f"*test{self.exe_ext}"))
-        if not test_files:
+        if compiler == "cl":
+            cmd = (
+                self._compiler_command(compiler)
+                + flags
+                + ["/sourceDependencies", str(dep_file)]
+                + [str(test_file), str(lib_name), f"/Fe{exe_name}"]
+            )
+        else:
+            cmd = (
+                self._compiler_command(compiler)
+                + flags
+                + ["-MMD", "-MF", str(dep_file)]
+                + [
+                    str(test_file),
+                    f"-L{self.build_dir}",
+                    "-lbadcpp",
+                    "-o",
+                    str(exe_name),
+                ]
+            )
+
+        return cmd, None, log_path
+
+    def _parallel_tests(self):
+        """Names of tests marked safe to run concurrently in parallel_tests.txt"""
+        try:
+            lines = self.parallel_tests_file.read_text().splitlines()
+        except OSError:
+            return set()
+        names = (line.split("#", 1)[0].strip() for line in lines)
+        return {name for name in names if name}
+
+    def run_tests(self, test_exes):
+        """Run the given test executables
+
+        Tests run one at a time unless listed in tests/parallel_tests.txt,
+        since they may share files such as test.txt in the project root.
+        """
+        if not test_exes:
             self.print_error("Compiled tests not found")
             return False
 
         self.print_info("Running tests...")
 
-        all_passed = True
-        for test_file in test_files:
-            self.print_info(f"Running {test_file.name}...")
-            try:
-                result = subprocess.run(
-                    [str(test_file)], capture_output=True, text=True
-                )
-                if result.returncode == 0:
+        passed = []
+
+        def run_group(group, jobs):
+            def on_finished(index, returncode, log_path):
+                test_file = group[index]
+                if returncode == 0:
                     self.print_success(f"Test {test_file.name} passed")
+                    passed.append(test_file)
                 else:
                     self.print_error(f"Test {test_file.name} failed")
-                    print(result.stdout)
-                    print(result.stderr)
-                    all_passed = False
-            except Exception as e:
-                self.print_error(f"Error running test {test_file.name}: {e}")
-                all_passed = False
+                    for stream in ("out", "err"):
+                        output = self._read_log(log_path, stream)
+                        if output.strip():
+                            print(output.rstrip("\n"))
+                return True
+
+            commands = []
+            for test_file in group:
+                self.print_info(f"Running {test_file.name}...")
+                log_path = self.build_dir / f"{test_file.stem}.run"
+                commands.append(([str(test_file)], self.project_root, log_path))
+            self._run_commands(commands, on_finished, jobs)
+
+        parallel = self._parallel_tests()
+        run_group([exe for exe in test_exes if exe.stem in parallel], None)
+        run_group([exe for exe in test_exes if exe.stem not in parallel], 1)
 
-        return all_passed
+        return len(passed) == len(test_exes)
 
     def run_example(self):
         """Run example"""
-        exe_name = self.build_dir / f"example{self.exe_ext}"
+        exe_name = self.example_exe
         if not exe_name.exists():
             self.print_error(f"Executable not found: {exe_name}")
             return False
 
         self.print_info("Running example...")
         try:
-            subprocess.run([str(exe_name)])
+            subprocess.run([str(exe_name)], cwd=self.project_root)
             return True
         except Exception as e:
             self.print_error(f"Error running example: {e}")
@@ -367,39 +1113,23 @@ class BuildSystem:
         """Clean generated files"""
         self.print_info("Cleaning...")
 
-        patterns = [
-            "*.o",
-            "*.obj",
-            "*.lib",
-            "*.a",
-            f"example{self.exe_ext}",
-            "test.txt",
-            "*.pdb",
-            "*.ilk",
-        ]
-
-        cleaned = 0
-        # Clean build directory
-        if self.build_dir.exists():
-            for pattern in patterns:
-                if "*" in pattern:
-                    # Use glob for patterns
-                    for file in self.build_dir.glob(pattern):
-                        try:
-                            file.unlink()
-                            cleaned += 1
-                        except OSError:
-                            pass
-                else:
-                    file_path = self.build_dir / pattern
-                    if file_path.exists():
-                        try:
-                            file_path.unlink()
-                            cleaned += 1
-                        except OSError:
-                            pass
+        daemon_socket = daemon_address(self.build_dir)
+        if os.path.exists(daemon_socket):
+            # A running daemon listens inside, so empty the directory around it
+            with os.scandir(self.build_dir) as entries:
+                for entry in entries:
+                    if entry.path == daemon_socket:
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        shutil.rmtree(entry.path, ignore_errors=True)
+                    else:
+                        with contextlib.suppress(OSError):
+                            os.unlink(entry.path)
+        else:
+            shutil.rmtree(self.build_dir, ignore_errors=True)
+        self.build_dir.mkdir(parents=True, exist_ok=True)
 
-        self.print_success(f"Files removed: {cleaned}")
+        self.print_success(f"Build directory cleaned: {self.build_dir}")
 
     def print_system_info(self):
         """Print system information"""
@@ -456,8 +1186,10 @@ class BuildSystem:
             return False
 
         # Compile tests
+        test_exes = []
         if build_tests:
-            if not self.compile_tests(selected_compiler, build_type):
+            test_exes = self.compile_tests(selected_compiler, build_type)
+            if not test_exes:
                 return False
 
         self.print_success("Build completed successfully!")
@@ -468,7 +1200,7 @@ class BuildSystem:
 
         # Run tests
         if build_tests:
-            if not self.run_tests():
+            if not self.run_tests(test_exes):
                 self.print_warning("Some tests failed")
                 return False
             else:
@@ -477,6 +1209,115 @@ class BuildSystem:
         return True
 
 
+def daemon_address(build_dir):
+    """Local socket (or named pipe on Windows) of the build daemon"""
+    if platform.system() == "Windows":
+        digest = hashlib.md5(str(build_dir).encode()).hexdigest()[:12]
+        return rf"\\.\pipe\badcpplib-{digest}"
+    return str(build_dir / ".daemon.sock")
+
+
+class _ConnectionWriter(io.TextIOBase):
+    """Text stream forwarding writes to a daemon client"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def write(self, text):
+        self.conn.send_bytes(json.dumps({"out": text}).encode())
+        return len(text)
+
+
+class BuildDaemon:
+    """Long-lived BuildSystem serving build requests over a local socket
+
+    Requests are JSON messages such as {"cmd": "build", "args": {...}}.
+    Output is streamed back as {"out": text} messages, followed by a final
+    {"exit": code}. Compiler probes and the build cache stay in memory
+    between requests.
+    """
+
+    BUILD_ARGS = ("compiler", "build_type", "use_library", "build_tests")
+
+    def __init__(self, build_system):
+        self.build_system = build_system
+        self.address = daemon_address(build_system.build_dir)
+
+    def serve_forever(self):
+        """Accept and handle requests until interrupted"""
+        if platform.system() != "Windows" and os.path.exists(self.address):
+            # Leftover socket from a daemon that did not shut down cleanly
+            try:
+                Client(self.address).close()
+                self.build_system.print_error("Build daemon already running")
+                return False
+            except OSError:
+                os.unlink(self.address)
+
+        self.build_system.print_info(f"Build daemon listening on {self.address}")
+        try:
+            with Listener(self.address) as listener:
+                while True:
+                    with listener.accept() as conn:
+                        self.handle(conn)
+        except KeyboardInterrupt:
+            self.build_system.print_info("Build daemon stopped")
+        return True
+
+    def handle(self, conn):
+        """Run a single request, streaming its output to the client"""
+        try:
+            request = json.loads(conn.recv_bytes())
+        except (EOFError, OSError, ValueError):
+            return
+
+        try:
+            with contextlib.redirect_stdout(_ConnectionWriter(conn)):
+                success = self.dispatch(request)
+            conn.send_bytes(json.dumps({"exit": 0 if success else 1}).encode())
+        except OSError:
+            # Client went away mid-request
+            pass
+
+    def dispatch(self, request):
+        """Execute a decoded request"""
+        cmd = request.get("cmd")
+        if cmd == "build":
+            args = request.get("args", {})
+            return self.build_system.build(
+                **{key: args[key] for key in self.BUILD_ARGS if key in args}
+            )
+        if cmd == "clean":
+            self.build_system.clean()
+            return True
+
+        self.build_system.print_error(f"Unknown daemon command: {cmd}")
+        return False
+
+
+def run_daemon_client(build_dir, request):
+    """Send a request to the build daemon, returning its exit code
+
+    Returns None if no daemon is listening.
+    """
+    try:
+        conn = Client(daemon_address(build_dir))
+    except OSError:
+        return None
+
+    with conn:
+        conn.send_bytes(json.dumps(request).encode())
+        while True:
+            try:
+                message = json.loads(conn.recv_bytes())
+            except (EOFError, OSError):
+                return 1
+            if "out" in message:
+                sys.stdout.write(message["out"])
+            else:
+                return message.get("exit", 1)
+
+
 def main():
     """Main function"""
     parser = argparse.ArgumentParser(
@@ -518,10 +1359,49 @@ def main():
         "--test", "-t", action="store_true", help="Build and run tests"
     )
 
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Keep running and serve builds requested with --daemon-client",
+    )
+
+    parser.add_argument(
+        "--daemon-client",
+        action="store_true",
+        help="Send the build (or --clean) to a running build daemon",
+    )
+
     args = parser.parse_args()
 
+    Colors.ensure_initialized(platform.system())
     build_system = BuildSystem()
 
+    if args.daemon:
+        sys.exit(0 if BuildDaemon(build_system).serve_forever() else 1)
+
+    if args.daemon_client:
+        if args.clean:
+            request = {"cmd": "clean"}
+        else:
+            request = {
+                "cmd": "build",
+                "args": {
+                    "compiler": args.compiler,
+                    "build_type": args.build_type,
+                    "use_library": not args.direct,
+                    "build_tests": args.test,
+                },
+            }
+
+        code = run_daemon_client(build_system.build_dir, request)
+        if code is None:
+            build_system.print_warning("Build daemon not running, building locally")
+        else:
+            # The example runs here so its output reaches this terminal
+            if code == 0 and args.run and not args.clean:
+                build_system.run_example()
+            sys.exit(code)
+
     if args.clean:
         build_system.clean()
         return
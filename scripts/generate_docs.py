@@ -9,33 +9,73 @@ Usage:
     python scripts/generate_docs.py [options]
 
 Options:
-    --format html|latex|xml|man    Output format (default: html)
+    --format <formats>             html|latex|xml|man, a comma-separated
+                                   list or all (default: html)
     --output <dir>                 Output directory (default: docs/generated)
     --config <file>                Custom Doxyfile (default: docs/Doxyfile)
     --open                         Open documentation after generation
     --clean                        Clean output directory before generation
     --warnings-only                Show only warnings and errors
     --check                        Check for documentation issues
+    --cache-mode mtime|hash|auto   Detect unchanged inputs (default: auto)
     --serve [port]                 Serve HTML documentation locally
     --help                         Show this help message
 
+Environment:
+    DOXYGEN_CACHE_DIR              Keep input records here instead of in
+                                   the output directory
+
 Examples:
     python scripts/generate_docs.py
     python scripts/generate_docs.py --format html --open
+    python scripts/generate_docs.py --format html,xml
     python scripts/generate_docs.py --clean --warnings-only
     python scripts/generate_docs.py --serve 8080
 """
 
+import io
 import os
+import re
 import sys
+import json
+import hashlib
 import subprocess
 import argparse
-import shutil
-import http.server
-import socketserver
-import webbrowser
-import platform
+import functools
+import itertools
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
+from stat import S_ISDIR
+
+# Input state of the last successful Doxygen run per format, kept in the
+# output directory
+INPUTS_CACHE = '.doxygen_inputs.{}.json'
+INPUTS_HASH_CACHE = '.doxygen_inputs_hash.{}.json'
+
+# A file each format is expected to produce
+OUTPUT_MARKERS = {
+    'html': 'html/index.html',
+    'latex': 'latex/refman.tex',
+    'xml': 'xml/index.xml',
+    'man': 'man',
+}
+
+# Lines with parentheses that mention template/inline or end with ';'
+DECLARATION_RE = re.compile(
+    rb'^(?=[^\n]*\()(?=[^\n]*\))[^\n]*(?:template|inline|;[^\S\n]*$)[^\n]*$',
+    re.M)
+# Comment lines that count as documentation
+DOC_LINE_RE = re.compile(rb'\s*(?://|\*)')
+
+# Doxygen output lines kept by --warnings-only
+WARNING_LINE_RE = re.compile(rb'warning|error', re.I)
+
+# Doxygen inputs used when the Doxyfile sets no INPUT
+DEFAULT_INPUTS = ['include/badcpplib']
+
+# Below this many headers a process pool costs more than it saves
+PARALLEL_SCAN_THRESHOLD = 32
 
 class Colors:
     """ANSI color codes for terminal output."""
@@ -49,31 +89,58 @@ class Colors:
     BOLD = '\033[1m'
     UNDERLINE = '\033[4m'
 
-def print_colored(message, color=Colors.ENDC):
-    """Print colored message to terminal."""
-    print(f"{color}{message}{Colors.ENDC}")
+# Colors are only emitted to terminals; pipes and CI logs get plain text
+_IS_TTY = sys.stdout.isatty()
+
+if _IS_TTY:
+    def print_colored(message, color=Colors.ENDC):
+        """Print colored message to terminal."""
+        sys.stdout.write(color + message + Colors.ENDC + '\n')
+else:
+    def print_colored(message, color=None):
+        """Print message without colors."""
+        print(message)
+
+# Colored prefixes of the message helpers, built once
+_HEADER_RULE = '=' * 60
+_SUCCESS_PREFIX = Colors.OKGREEN + '✓ ' if _IS_TTY else '✓ '
+_WARNING_PREFIX = Colors.WARNING + '⚠ ' if _IS_TTY else '⚠ '
+_ERROR_PREFIX = Colors.FAIL + '✗ ' if _IS_TTY else '✗ '
+_INFO_PREFIX = Colors.OKBLUE + 'ℹ ' if _IS_TTY else 'ℹ '
+_SUFFIX = Colors.ENDC + '\n' if _IS_TTY else '\n'
 
 def print_header(message):
     """Print header message."""
-    print_colored(f"\n{'='*60}", Colors.HEADER)
-    print_colored(f" {message}", Colors.HEADER + Colors.BOLD)
-    print_colored(f"{'='*60}", Colors.HEADER)
+    print_colored('\n' + _HEADER_RULE, Colors.HEADER)
+    print_colored(' ' + message, Colors.HEADER + Colors.BOLD)
+    print_colored(_HEADER_RULE, Colors.HEADER)
 
 def print_success(message):
     """Print success message."""
-    print_colored(f"✓ {message}", Colors.OKGREEN)
+    sys.stdout.write(_SUCCESS_PREFIX + message + _SUFFIX)
 
 def print_warning(message):
     """Print warning message."""
-    print_colored(f"⚠ {message}", Colors.WARNING)
+    sys.stdout.write(_WARNING_PREFIX + message + _SUFFIX)
 
 def print_error(message):
     """Print error message."""
-    print_colored(f"✗ {message}", Colors.FAIL)
+    sys.stdout.write(_ERROR_PREFIX + message + _SUFFIX)
 
 def print_info(message):
     """Print info message."""
-    print_colored(f"ℹ {message}", Colors.OKBLUE)
+    sys.stdout.write(_INFO_PREFIX + message + _SUFFIX)
+
+def _probe(tool):
+    """Return the first line of `tool --version`, or None if unavailable."""
+    try:
+        result = subprocess.run([tool, '--version'],
+                                capture_output=True, text=True)
+    except FileNotFoundError:
+        return None
+    if result.returncode != 0:
+        return None
+    return result.stdout.strip().split('\n')[0]
 
 def check_dependencies():
     """Check if required tools are installed."""
@@ -87,26 +154,21 @@ def check_dependencies():
     missing_required = []
     missing_optional = []
     
+    # Probe all tools at once; each probe mostly waits on process startup
+    with ThreadPoolExecutor(max_workers=len(dependencies)) as executor:
+        versions = dict(zip(dependencies, executor.map(_probe, dependencies)))
+    
     for tool, description in dependencies.items():
-        try:
-            result = subprocess.run([tool, '--version'], 
-                                  capture_output=True, text=True)
-            if result.returncode == 0:
-                version = result.stdout.strip().split('\n')[0]
-                if tool == 'doxygen':
-                    print_success(f"{tool}: {version}")
-                else:
-                    print_success(f"{tool}: {version} (optional)")
-            else:
-                if tool == 'doxygen':
-                    missing_required.append((tool, description))
-                else:
-                    missing_optional.append((tool, description))
-        except FileNotFoundError:
+        version = versions[tool]
+        if version is not None:
             if tool == 'doxygen':
-                missing_required.append((tool, description))
+                print_success(f"{tool}: {version}")
             else:
-                missing_optional.append((tool, description))
+                print_success(f"{tool}: {version} (optional)")
+        elif tool == 'doxygen':
+            missing_required.append((tool, description))
+        else:
+            missing_optional.append((tool, description))
     
     if missing_required:
         print_error("Missing required dependencies:")
@@ -125,28 +187,207 @@ def check_dependencies():
     
     return True
 
+@functools.lru_cache(maxsize=8192)
+def _stat(path):
+    """Stat a path once per run, returning None if it does not exist.
+    
+    Only used for inputs (project layout, configs), which do not change
+    while the script runs; generated outputs are always checked afresh.
+    """
+    try:
+        return os.stat(path)
+    except OSError:
+        return None
+
+def _exists(path):
+    """Check whether an input path exists, using the stat cache."""
+    return _stat(str(path)) is not None
+
+def _is_dir(path):
+    """Check whether an input path is a directory, using the stat cache."""
+    result = _stat(str(path))
+    return result is not None and S_ISDIR(result.st_mode)
+
+@functools.lru_cache(maxsize=1)
 def find_project_root():
-    """Find the project root directory."""
+    """Find the project root directory (looked up once per process)."""
     current = Path.cwd()
     while current != current.parent:
-        if (current / 'include' / 'badcpplib').exists():
+        if _is_dir(os.path.join(current, 'include', 'badcpplib')):
             return current
         current = current.parent
     
     # If not found, assume current directory
     return Path.cwd()
 
+def read_doxyfile(config_file, sources=None):
+    """Return the text of a Doxyfile with its @INCLUDEs expanded.
+    
+    The paths of all files read are appended to sources if given.
+    """
+    config_file = Path(config_file)
+    content = config_file.read_text(errors='ignore').replace('\\\n', ' ')
+    if sources is not None:
+        sources.append(config_file)
+    
+    def expand(match):
+        included = Path(match.group(1) or match.group(2))
+        if not included.is_absolute():
+            included = config_file.parent / included
+        return read_doxyfile(included, sources) if _exists(included) else ''
+    
+    return re.sub(r'^\s*@INCLUDE\s*=\s*(?:"([^"]*)"|(\S+)).*$', expand, content,
+                  flags=re.M)
+
+def parse_doxyfile_inputs(content):
+    """Return the INPUT entries of Doxyfile text."""
+    inputs = []
+    for match in re.finditer(r'^\s*INPUT\s*(\+?=)(.*)$', content, re.M):
+        if match.group(1) == '=':
+            inputs = []
+        inputs.extend(quoted or bare for quoted, bare
+                      in re.findall(r'"([^"]*)"|(\S+)', match.group(2)))
+    return inputs
+
+def _scan_inputs(path, stamps, skip):
+    """Record (mtime, size) of every file under path into stamps."""
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.path in skip:
+                    continue
+                if entry.is_dir():
+                    _scan_inputs(entry.path, stamps, skip)
+                elif entry.is_file():
+                    stat = entry.stat()
+                    stamps[entry.path] = [stat.st_mtime_ns, stat.st_size]
+    except NotADirectoryError:
+        stat = os.stat(path)
+        stamps[str(path)] = [stat.st_mtime_ns, stat.st_size]
+    except OSError:
+        pass
+
+def collect_input_stamps(config_file, project_root, output_dir):
+    """Collect the state of the Doxygen inputs used to skip unchanged runs."""
+    content = read_doxyfile(config_file)
+    inputs = parse_doxyfile_inputs(content) or DEFAULT_INPUTS
+    # Output and configs may live under an input directory (e.g. INPUT = .)
+    skip = {os.path.normpath(os.path.join(project_root, path))
+            for path in (output_dir, config_file)}
+    paths = {}
+    for entry in inputs:
+        path = os.path.normpath(os.path.join(project_root, entry))
+        _scan_inputs(path, paths, skip)
+    # Relative keys keep the records valid when the checkout moves
+    stamps = {os.path.relpath(path, project_root): stamp
+              for path, stamp in paths.items()}
+    # Custom configs are rewritten on every run, so key on their contents
+    stamps['config'] = hashlib.sha256(content.encode()).hexdigest()
+    return stamps
+
+def input_paths(config_file, project_root, output_dir):
+    """List the Doxygen input files and directories plus the base configs."""
+    sources = []
+    content = read_doxyfile(config_file, sources)
+    # The generated overlay is rewritten on every run; its bases are not
+    paths = [path for path in sources if path != Path(config_file)]
+    output_dir = os.path.normpath(os.path.join(project_root, output_dir))
+    for entry in parse_doxyfile_inputs(content) or DEFAULT_INPUTS:
+        path = os.path.normpath(os.path.join(project_root, entry))
+        if not os.path.isdir(path):
+            paths.append(path)
+        # Directories are included too: removing a file changes their mtime
+        for root, dirs, files in os.walk(path):
+            dirs[:] = [name for name in dirs
+                       if os.path.join(root, name) != output_dir]
+            paths.append(root)
+            paths.extend(os.path.join(root, name) for name in files)
+    return paths
+
+def _is_up_to_date(inputs, outputs):
+    """Check whether every output is newer than every input, like make."""
+    try:
+        newest_input = max(os.stat(path).st_mtime_ns for path in inputs)
+        oldest_output = min(os.stat(path).st_mtime_ns for path in outputs)
+    except (OSError, ValueError):
+        return False
+    return newest_input <= oldest_output
+
+def _hash_input(path):
+    """Return a BLAKE2 digest of a file, read in 64 KiB chunks."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _load_json(path):
+    """Load a JSON file, returning None if it is missing or corrupt."""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def record_files(output_dir, format_type, cache_dir=None):
+    """Return the paths of the input records of a format."""
+    cache_dir = Path(cache_dir) if cache_dir else Path(output_dir)
+    return [cache_dir / INPUTS_CACHE.format(format_type),
+            cache_dir / INPUTS_HASH_CACHE.format(format_type)]
+
+def discard_records(output_dir, format_type, cache_dir=None):
+    """Remove the input records of a format after a failed run."""
+    for path in record_files(output_dir, format_type, cache_dir):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def save_records(records):
+    """Write input records returned by check_inputs."""
+    for path, record in records.items():
+        os.makedirs(path.parent, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(record, f)
+
+def check_inputs(config_file, output_dir, format_type, cache_mode='auto',
+                 cache_dir=None):
+    """Compare the Doxygen inputs against the last successful run.
+    
+    Returns whether they are unchanged and the records to save once the
+    documentation is current. 'mtime' compares mtimes and sizes, 'hash'
+    compares contents (mtimes are reset by fresh checkouts and CI caches),
+    and 'auto' only hashes when the mtimes differ. Records are kept in
+    cache_dir, which defaults to the output directory.
+    """
+    project_root = find_project_root()
+    output_dir = Path(output_dir)
+    stamps = collect_input_stamps(config_file, project_root, output_dir)
+    stamps_file, hashes_file = record_files(output_dir, format_type, cache_dir)
+    records = {}
+    
+    if cache_mode != 'hash':
+        records[stamps_file] = stamps
+        if _load_json(stamps_file) == stamps:
+            return True, records
+        if cache_mode == 'mtime':
+            return False, records
+    
+    hashes = {path: stamp if path == 'config'
+              else _hash_input(os.path.join(project_root, path))
+              for path, stamp in stamps.items()}
+    records[hashes_file] = hashes
+    return _load_json(hashes_file) == hashes, records
+
 def create_custom_doxyfile(base_config, output_dir, format_type):
     """Create a custom Doxyfile with specified options."""
-    project_root = find_project_root()
-    custom_config = project_root / 'docs' / f'Doxyfile.{format_type}'
+    # Keep the overlay in the output directory, which is never scanned as
+    # an input; Doxygen resolves relative paths against the working directory
+    os.makedirs(output_dir, exist_ok=True)
+    custom_config = Path(output_dir) / f'Doxyfile.{format_type}'
     
     print_info(f"Creating custom configuration: {custom_config}")
     
-    # Read base configuration
-    with open(base_config, 'r') as f:
-        content = f.read()
-    
     # Modify settings based on format
     modifications = {
         'html': {
@@ -178,23 +419,59 @@ def create_custom_doxyfile(base_config, output_dir, format_type):
         }
     }
     
-    # Apply modifications
-    for key, value in modifications.get(format_type, {}).items():
-        content = content.replace(f'{key} = ', f'{key} = {value} #')
-    
-    # Set output directory
-    content = content.replace(
-        'OUTPUT_DIRECTORY       = docs/generated',
-        f'OUTPUT_DIRECTORY       = {output_dir}'
-    )
+    settings = {
+        # Let Doxygen parse inputs and render dot graphs on all cores
+        'NUM_PROC_THREADS': '0',
+        'DOT_NUM_THREADS': '0',
+        'DOT_MULTI_TARGETS': 'YES',
+        'OUTPUT_DIRECTORY': f'"{output_dir}"',
+    }
+    settings.update(modifications.get(format_type, {}))
     
-    # Write custom configuration
+    # Write an overlay: Doxygen reads the base configuration through
+    # @INCLUDE and later assignments override its values
+    lines = [f'@INCLUDE = "{Path(base_config).resolve()}"']
+    lines.extend(f'{key} = {value}' for key, value in settings.items())
     with open(custom_config, 'w') as f:
-        f.write(content)
+        f.write('\n'.join(lines) + '\n')
     
     return custom_config
 
-def generate_documentation(config_file, output_dir, warnings_only=False):
+def snapshot_outputs(directory):
+    """Record the mtime and digest of every file under directory."""
+    stamps = {}
+    _scan_inputs(directory, stamps, set())
+    with ThreadPoolExecutor() as executor:
+        digests = executor.map(_hash_input, stamps)
+        return {path: (stamps[path][0], digest)
+                for path, digest in zip(stamps, digests)}
+
+def restore_unchanged_mtimes(snapshot):
+    """Restore the old mtime of files Doxygen rewrote with the same contents.
+    
+    Doxygen rewrites every output file, which would otherwise make
+    incremental downstream builds (e.g. Sphinx with Breathe) redo all work.
+    """
+    paths = [path for path in snapshot if os.path.isfile(path)]
+    with ThreadPoolExecutor() as executor:
+        digests = list(executor.map(_hash_input, paths))
+    restored = 0
+    for path, digest in zip(paths, digests):
+        mtime, old_digest = snapshot[path]
+        if digest == old_digest:
+            os.utime(path, ns=(mtime, mtime))
+            restored += 1
+    return restored
+
+def _write_raw(line):
+    """Write a raw output line from Doxygen to stdout."""
+    sys.stdout.flush()
+    sys.stdout.buffer.write(line)
+    sys.stdout.buffer.flush()
+
+def generate_documentation(config_file, output_dir, warnings_only=False,
+                           format_type='html', cache_mode='auto',
+                           cache_dir=None):
     """Generate documentation using Doxygen."""
     print_header("Generating Documentation")
     print_info(f"Configuration: {config_file}")
@@ -203,39 +480,120 @@ def generate_documentation(config_file, output_dir, warnings_only=False):
     # Ensure output directory exists
     os.makedirs(output_dir, exist_ok=True)
     
+    # Skip Doxygen entirely when the output is newer than all inputs, or
+    # else when no input changed since the last run. Records only exist
+    # after a successful run, so output left by a failed one is not trusted.
+    # Hash mode is for mtimes that cannot be trusted, so it always compares
+    # contents
+    marker = Path(output_dir) / OUTPUT_MARKERS[format_type]
+    if cache_mode != 'hash':
+        succeeded = any(path.exists() for path in
+                        record_files(output_dir, format_type, cache_dir))
+        inputs = input_paths(config_file, find_project_root(), output_dir)
+        if succeeded and _is_up_to_date(inputs, [marker]):
+            print_success("Documentation is up to date, skipping Doxygen")
+            return True
+    unchanged, records = check_inputs(config_file, output_dir, format_type,
+                                      cache_mode, cache_dir)
+    if unchanged and marker.exists():
+        save_records(records)
+        print_success("Documentation is up to date, skipping Doxygen")
+        return True
+    
+    # Snapshot only this format's output so unchanged files can keep their
+    # timestamps; other formats may be generating next to it
+    format_dir = Path(output_dir) / OUTPUT_MARKERS[format_type].split('/')[0]
+    snapshot = snapshot_outputs(format_dir)
+    
     # Run Doxygen
     try:
-        result = subprocess.run(['doxygen', str(config_file)], 
-                              capture_output=True, text=True)
+        # Stream raw output as Doxygen produces it instead of buffering it
+        # all; stdout is only needed when everything is shown
+        proc = subprocess.Popen(['doxygen', str(config_file)],
+                                stdout=(subprocess.DEVNULL if warnings_only
+                                        else subprocess.PIPE),
+                                stderr=subprocess.PIPE)
+        matched = 0
         
-        if warnings_only:
-            # Filter to show only warnings and errors
-            lines = result.stderr.split('\n')
-            filtered_lines = [line for line in lines 
-                            if 'warning' in line.lower() or 'error' in line.lower()]
-            if filtered_lines:
-                print_warning("Documentation warnings/errors:")
-                for line in filtered_lines:
-                    print(line)
-            else:
-                print_success("No warnings or errors found!")
-        else:
-            if result.stdout:
-                print(result.stdout)
-            if result.stderr:
-                print(result.stderr)
+        def drain_stderr():
+            nonlocal matched
+            for line in proc.stderr:
+                if warnings_only:
+                    # Filter to show only warnings and errors
+                    if not WARNING_LINE_RE.search(line):
+                        continue
+                    if not matched:
+                        print_warning("Documentation warnings/errors:")
+                    matched += 1
+                _write_raw(line)
+        
+        stderr_reader = threading.Thread(target=drain_stderr, daemon=True)
+        stderr_reader.start()
+        if proc.stdout is not None:
+            for line in proc.stdout:
+                _write_raw(line)
+        stderr_reader.join()
+        returncode = proc.wait()
+        
+        if warnings_only and not matched:
+            print_success("No warnings or errors found!")
         
-        if result.returncode == 0:
+        if returncode == 0:
+            restored = restore_unchanged_mtimes(snapshot)
+            if restored:
+                print_info(f"Kept timestamps of {restored} unchanged files")
+            # The marker must stay newer than the inputs for the fast path
+            # above, even when its contents did not change
+            try:
+                os.utime(marker)
+            except OSError:
+                pass
+            save_records(records)
             print_success("Documentation generated successfully!")
             return True
         else:
-            print_error(f"Doxygen failed with return code {result.returncode}")
+            discard_records(output_dir, format_type, cache_dir)
+            print_error(f"Doxygen failed with return code {returncode}")
             return False
             
     except Exception as e:
+        discard_records(output_dir, format_type, cache_dir)
         print_error(f"Error running Doxygen: {e}")
         return False
 
+def _has_doc_comment(content, start):
+    """Check whether one of the three lines before offset start is a comment."""
+    end = start - 1
+    for _ in range(3):
+        if end < 0:
+            return False
+        begin = content.rfind(b'\n', 0, end) + 1
+        if DOC_LINE_RE.match(content, begin, end):
+            return True
+        end = begin - 1
+    return False
+
+def _scan_header(header_file):
+    """Return possible documentation issues found in one header."""
+    # The patterns are ASCII, so scan raw bytes and skip decoding the file
+    with open(header_file, 'rb') as f:
+        content = f.read()
+    
+    # Simple check for functions without documentation: a declaration-like
+    # line with no comment line among the three lines above it
+    issues = []
+    line_no, counted = 1, 0
+    for match in DECLARATION_RE.finditer(content):
+        start = match.start()
+        if start == 0 or _has_doc_comment(content, start):
+            continue
+        line_no += content.count(b'\n', counted, start)
+        counted = start
+        line = match.group().strip().decode('utf-8', errors='ignore')
+        issues.append(f"{header_file.name}:{line_no}: "
+                      f"Possible undocumented function: {line}")
+    return issues
+
 def check_documentation_issues(project_root):
     """Check for common documentation issues."""
     print_header("Checking Documentation Issues")
@@ -244,23 +602,16 @@ def check_documentation_issues(project_root):
     
     # Check for undocumented functions
     include_dir = project_root / 'include' / 'badcpplib'
-    if include_dir.exists():
-        for header_file in include_dir.glob('*.hpp'):
-            with open(header_file, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-                
-                # Simple check for functions without documentation
-                lines = content.split('\n')
-                for i, line in enumerate(lines):
-                    if (('(' in line and ')' in line and 
-                         ('template' in line or 'inline' in line or 
-                          line.strip().endswith(';'))) and
-                        i > 0 and not lines[i-1].strip().startswith('*')):
-                        if not any(doc_line.strip().startswith('//') or 
-                                 doc_line.strip().startswith('*') 
-                                 for doc_line in lines[max(0, i-3):i]):
-                            issues.append(f"{header_file.name}:{i+1}: "
-                                        f"Possible undocumented function: {line.strip()}")
+    if _is_dir(include_dir):
+        paths = list(include_dir.rglob('*.hpp'))
+        if len(paths) >= PARALLEL_SCAN_THRESHOLD:
+            # Spread large header trees over all cores
+            with ProcessPoolExecutor() as executor:
+                results = executor.map(_scan_header, paths, chunksize=8)
+                issues = list(itertools.chain.from_iterable(results))
+        else:
+            for path in paths:
+                issues.extend(_scan_header(path))
     
     if issues:
         print_warning(f"Found {len(issues)} potential documentation issues:")
@@ -276,6 +627,8 @@ def open_documentation(output_dir, format_type):
     if format_type == 'html':
         index_file = Path(output_dir) / 'html' / 'index.html'
         if index_file.exists():
+            import platform
+            
             print_info(f"Opening documentation: {index_file}")
             if platform.system() == 'Darwin':  # macOS
                 subprocess.run(['open', str(index_file)])
@@ -290,6 +643,19 @@ def open_documentation(output_dir, format_type):
 
 def serve_documentation(output_dir, port=8000):
     """Serve HTML documentation locally."""
+    # Server modules are only imported when serving; most runs never do
+    import socket
+    import http.server
+    import webbrowser
+    
+    class DocsHTTPServer(http.server.ThreadingHTTPServer):
+        """HTTP server answering requests in parallel, without Nagle delays."""
+        
+        def get_request(self):
+            request, client_address = super().get_request()
+            request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            return request, client_address
+    
     html_dir = Path(output_dir) / 'html'
     if not html_dir.exists():
         print_error(f"HTML documentation not found in {html_dir}")
@@ -300,31 +666,92 @@ def serve_documentation(output_dir, port=8000):
     print_info(f"URL: http://localhost:{port}")
     print_info("Press Ctrl+C to stop the server")
     
-    # Change to documentation directory
-    os.chdir(html_dir)
+    # Serve from the documentation directory without changing into it
+    handler = functools.partial(http.server.SimpleHTTPRequestHandler,
+                                directory=str(html_dir))
     
     # Open browser
     webbrowser.open(f'http://localhost:{port}')
     
     # Start server
     try:
-        with socketserver.TCPServer(("", port), http.server.SimpleHTTPRequestHandler) as httpd:
+        with DocsHTTPServer(("", port), handler) as httpd:
             httpd.serve_forever()
     except KeyboardInterrupt:
         print_info("\nServer stopped")
     except OSError as e:
         print_error(f"Failed to start server: {e}")
 
+def _fast_rmtree(path):
+    """Remove a directory tree, unlinking its files from a thread pool.
+    
+    Generated HTML trees hold many small files; overlapping the unlink
+    calls is faster than removing them one by one like shutil.rmtree.
+    """
+    files = []
+    directories = []
+    pending = [str(path)]
+    while pending:
+        directory = pending.pop()
+        directories.append(directory)
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                else:
+                    files.append(entry.path)
+    
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(os.unlink, files))
+    # Parents were collected before their subdirectories
+    for directory in reversed(directories):
+        os.rmdir(directory)
+
+def parse_formats(value):
+    """Parse --format: one format, a comma-separated list or 'all'."""
+    if value == 'all':
+        return list(OUTPUT_MARKERS)
+    formats = [name.strip() for name in value.split(',') if name.strip()]
+    for name in formats:
+        if name not in OUTPUT_MARKERS:
+            raise argparse.ArgumentTypeError(f"invalid format: '{name}'")
+    if not formats:
+        raise argparse.ArgumentTypeError("no format given")
+    return list(dict.fromkeys(formats))
+
+def _generate_task(task):
+    """Run generate_documentation for one (config, output, ...) task."""
+    return generate_documentation(*task)
+
+def _generate_task_buffered(task):
+    """Run one task with its output captured, return (result, output)."""
+    buffer = io.BytesIO()
+    stdout = sys.stdout
+    sys.stdout = io.TextIOWrapper(buffer, encoding=stdout.encoding or 'utf-8',
+                                  errors='replace', write_through=True)
+    try:
+        result = generate_documentation(*task)
+    finally:
+        sys.stdout.detach()
+        sys.stdout = stdout
+    return result, buffer.getvalue()
+
 def main():
     """Main function."""
+    # Fast path: the module docstring already documents every option
+    if '-h' in sys.argv[1:] or '--help' in sys.argv[1:]:
+        print(__doc__)
+        return
+    
     parser = argparse.ArgumentParser(
         description='Generate Doxygen documentation for BadCppLib',
         formatter_class=argparse.RawDescriptionHelpFormatter,
         epilog=__doc__
     )
     
-    parser.add_argument('--format', choices=['html', 'latex', 'xml', 'man'],
-                       default='html', help='Output format (default: html)')
+    parser.add_argument('--format', type=parse_formats, default='html',
+                       help='Output format(s): html, latex, xml, man, a '
+                            'comma-separated list or all (default: html)')
     parser.add_argument('--output', default='docs/generated',
                        help='Output directory (default: docs/generated)')
     parser.add_argument('--config', default='docs/Doxyfile',
@@ -337,11 +764,19 @@ def main():
                        help='Show only warnings and errors')
     parser.add_argument('--check', action='store_true',
                        help='Check for documentation issues')
+    parser.add_argument('--cache-mode', choices=['mtime', 'hash', 'auto'],
+                       default='auto',
+                       help='How to detect unchanged inputs (default: auto)')
     parser.add_argument('--serve', type=int, nargs='?', const=8000,
                        help='Serve HTML documentation locally (default port: 8000)')
     
     args = parser.parse_args()
     
+    # Serving an absolute output directory needs no project lookup
+    if args.serve is not None and Path(args.output).is_absolute():
+        serve_documentation(Path(args.output), args.serve)
+        return
+    
     # Find project root
     project_root = find_project_root()
     print_info(f"Project root: {project_root}")
@@ -365,32 +800,58 @@ def main():
         return
     
     # Verify configuration file exists
-    if not config_file.exists():
+    if not _exists(config_file):
         print_error(f"Configuration file not found: {config_file}")
         sys.exit(1)
     
     # Clean output directory if requested
     if args.clean and output_dir.exists():
         print_info(f"Cleaning output directory: {output_dir}")
-        shutil.rmtree(output_dir)
-    
-    # Create custom configuration if format is not HTML
-    if args.format != 'html':
-        config_file = create_custom_doxyfile(config_file, output_dir, args.format)
-    
-    # Generate documentation
-    success = generate_documentation(config_file, output_dir, args.warnings_only)
-    
-    if not success:
+        _fast_rmtree(output_dir)
+    
+    # Keep input records in a cache directory that outlives the output
+    # (e.g. one provided by CI), with a subdirectory per checkout
+    cache_dir = None
+    if os.environ.get('DOXYGEN_CACHE_DIR'):
+        checkout = hashlib.sha1(str(project_root).encode()).hexdigest()[:8]
+        cache_dir = Path(os.environ['DOXYGEN_CACHE_DIR']) / checkout
+        print_info(f"Input records: {cache_dir}")
+    
+    # Create custom configurations with the format and threading settings
+    tasks = [(create_custom_doxyfile(config_file, output_dir, format_type),
+              output_dir, args.warnings_only, format_type, args.cache_mode,
+              cache_dir)
+             for format_type in args.format]
+    
+    # Generate documentation, running independent formats in parallel
+    if len(tasks) == 1:
+        results = [_generate_task(tasks[0])]
+    else:
+        # Each format's output is printed in one piece when it finishes, so
+        # progress lines and warnings of different formats do not interleave
+        with ProcessPoolExecutor(max_workers=len(tasks)) as executor:
+            futures = [executor.submit(_generate_task_buffered, task)
+                       for task in tasks]
+            results = []
+            for future in as_completed(futures):
+                result, output = future.result()
+                results.append(result)
+                sys.stdout.flush()
+                sys.stdout.buffer.write(output)
+                sys.stdout.buffer.flush()
+    
+    # Clean up custom config files
+    for task in tasks:
+        if task[0].name.startswith('Doxyfile.'):
+            task[0].unlink()
+    
+    if not all(results):
         sys.exit(1)
     
-    # Clean up custom config file
-    if args.format != 'html' and config_file.name.startswith('Doxyfile.'):
-        config_file.unlink()
-    
     # Open documentation if requested
     if args.open:
-        open_documentation(output_dir, args.format)
+        for format_type in args.format:
+            open_documentation(output_dir, format_type)
     
     print_success("Documentation generation completed!")
 
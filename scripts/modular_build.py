@@ -9,8 +9,15 @@ import sys
 import argparse
 import subprocess
 import json
+import shutil
+import re
+import shlex
+import hashlib
+import filecmp
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import List, Dict, Set, Optional
+from typing import List, Dict, Set, Optional, Tuple
 
 class Colors:
     """ANSI colors for console output"""
@@ -25,17 +32,47 @@ class Colors:
     UNDERLINE = '\033[4m'
     END = '\033[0m'
 
-def colorize(text: str, color: str) -> str:
-    """Adds color to text"""
-    return f"{color}{text}{Colors.END}"
+# Colors are only emitted to terminals, and never when NO_COLOR is set
+_USE_COLOR = sys.stdout.isatty() and os.environ.get('NO_COLOR') is None
+
+if _USE_COLOR:
+    def colorize(text: str, color: str) -> str:
+        """Adds color to text"""
+        return f"{color}{text}{Colors.END}"
+else:
+    def colorize(text: str, color: str) -> str:
+        """Returns text as is"""
+        return text
 
 class ModularBuildSystem:
     def __init__(self):
-        self.project_root = Path(__file__).parent.parent
+        self.project_root = Path(__file__).resolve().parent.parent
         self.include_dir = self.project_root / "include"
         self.src_dir = self.project_root / "src"
         self.build_dir = self.project_root / "build_cmake"
         self.tests_dir = self.project_root / "tests"
+        self.cache_dir = self.build_dir / ".objcache"
+        self.cache_entries = 256  # Translation units kept in the object cache
+        self._cache_dir_str = str(self.cache_dir)
+        self.graph_file = self.build_dir / ".buildgraph.json"
+        self.jobs: Optional[int] = None
+        self._response_files: Dict[str, str] = {}
+        self._objects_changed = False
+        self._pch_inputs: Dict[str, str] = {}
+        self._pch_keys: Dict[str, str] = {}
+        self._header_sigs: Dict[str, Optional[List[int]]] = {}
+        self._flag_support: Dict[Tuple[str, str], bool] = {}
+        self._cmd_cache: Dict[Tuple[str, str], Tuple[str, ...]] = {}
+        
+        # Per-instance memo tables, keyed on module sets
+        self._resolve_cache: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+        self._sources_cache: Dict[Tuple[str, ...], List[Path]] = {}
+        self._defines_cache: Dict[Tuple[str, ...], List[str]] = {}
+        
+        # Existing .cpp files, relative to src/ and tests/
+        self._src_index: Set[str] = set()
+        self._test_index: Set[str] = set()
+        self.invalidate()
         
         # Module definitions and dependencies (updated)
         self.modules = {
@@ -119,48 +156,144 @@ class ModularBuildSystem:
             }
         }
         
+        # Dependency graph: module -> dependencies, module -> dependents
+        self._adj = {name: tuple(info['depends']) for name, info in self.modules.items()}
+        self._rev: Dict[str, List[str]] = {name: [] for name in self.modules}
+        for name, deps in self._adj.items():
+            for dep in deps:
+                self._rev.setdefault(dep, []).append(name)
+        
         # Compilers
         self.compilers = {
             'g++': {
                 'command': 'g++',
-                'flags': ['-std=c++17', '-Wall', '-Wextra', '-Wpedantic']
+                'flags': ['-std=c++17', '-Wall', '-Wextra', '-Wpedantic', '-pipe'],
+                'build_flags': {'debug': ['-g', '-O0'], 'release': ['-O2', '-DNDEBUG']},
+                'optional_flags': {'release': ['-fno-plt']},
+                'define_fmt': '-D{}',
+                'include_fmt': '-I{}',
+                'compile_flag': '-c',
+                'object_fmt': '-o{}',
+                'exe_fmt': '-o{}',
+                'obj_ext': '.o',
+                'exe_ext': '',
+                'pch_ext': '.gch',
+                'depfile_flags': ['-MMD', '-MF{}'],
+                'depfile_ext': '.d',
+                'ninja_deps': 'gcc',
+                'batch_flag': None,
+                'archiver': ['ar', 'rcsT', '{}'],
+                'lib_ext': '.a'
             },
             'clang++': {
                 'command': 'clang++',
-                'flags': ['-std=c++17', '-Wall', '-Wextra', '-Wpedantic']
+                'flags': ['-std=c++17', '-Wall', '-Wextra', '-Wpedantic', '-pipe'],
+                'build_flags': {'debug': ['-g', '-O0'], 'release': ['-O2', '-DNDEBUG']},
+                'optional_flags': {'release': ['-fno-plt']},
+                'define_fmt': '-D{}',
+                'include_fmt': '-I{}',
+                'compile_flag': '-c',
+                'object_fmt': '-o{}',
+                'exe_fmt': '-o{}',
+                'obj_ext': '.o',
+                'exe_ext': '',
+                'pch_ext': '.pch',
+                'depfile_flags': ['-MMD', '-MF{}'],
+                'depfile_ext': '.d',
+                'ninja_deps': 'gcc',
+                'batch_flag': None,
+                'archiver': ['ar', 'rcsT', '{}'],
+                'lib_ext': '.a'
             },
             'cl': {
                 'command': 'cl',
-                'flags': ['/std:c++17', '/W4']
+                'flags': ['/std:c++17', '/W4'],
+                'build_flags': {'debug': ['/Od', '/Zi', '/FS', '/MDd'], 'release': ['/O2', '/MD', '/DNDEBUG']},
+                'optional_flags': {},
+                'define_fmt': '/D{}',
+                'include_fmt': '/I{}',
+                'compile_flag': '/c',
+                'object_fmt': '/Fo{}',
+                'exe_fmt': '/Fe{}',
+                'obj_ext': '.obj',
+                'exe_ext': '.exe',
+                'pch_ext': '.pch',
+                'depfile_flags': ['/sourceDependencies', '{}'],
+                'depfile_ext': '.json',
+                'ninja_deps': 'msvc',
+                'batch_flag': '/MP{}',
+                'archiver': ['lib', '/OUT:{}'],
+                'lib_ext': '.lib'
             }
         }
     
-    def resolve_dependencies(self, module_names: List[str]) -> Set[str]:
-        """Resolves module dependencies"""
-        resolved = set()
+    @staticmethod
+    def _scan_files(root: Path, suffix: str) -> Set[str]:
+        """Lists files under root with the given suffix as relative POSIX paths"""
+        found = set()
+        pending = [(str(root), '')]
+        while pending:
+            path, prefix = pending.pop()
+            try:
+                entries = os.scandir(path)
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        pending.append((entry.path, f"{prefix}{entry.name}/"))
+                    elif entry.name.endswith(suffix):
+                        found.add(prefix + entry.name)
+        return found
+    
+    def invalidate(self):
+        """Rescans source trees and drops results derived from them"""
+        self._src_index = self._scan_files(self.src_dir, '.cpp')
+        self._test_index = self._scan_files(self.tests_dir, '.cpp')
+        self._sources_cache.clear()
+        self._header_sigs.clear()
+    
+    def resolve_dependencies(self, module_names: Tuple[str, ...]) -> Tuple[str, ...]:
+        """Resolves module dependencies, dependencies first (memoized per module set)"""
+        key = tuple(sorted(set(module_names)))
+        if key in self._resolve_cache:
+            return self._resolve_cache[key]
         
-        def resolve_module(name: str):
-            if name in resolved:
-                return
-            
+        # Dependency closure (core is always included)
+        closure = set()
+        pending = deque(('core',) + key)
+        while pending:
+            name = pending.popleft()
+            if name in closure:
+                continue
             if name not in self.modules:
                 raise ValueError(f"Unknown module: {name}")
-            
-            module = self.modules[name]
-            
-            # First resolve dependencies
-            for dep in module['depends']:
-                resolve_module(dep)
-            
-            resolved.add(name)
+            closure.add(name)
+            pending.extend(self._adj[name])
+        
+        # Kahn's algorithm; modules are visited in definition order so the
+        # result is the same on every run
+        indegree = {name: 0 for name in self.modules if name in closure}
+        for name in indegree:
+            indegree[name] = sum(1 for dep in self._adj[name] if dep in closure)
+        queue = deque(name for name, degree in indegree.items() if degree == 0)
         
-        # core is always included
-        resolve_module('core')
+        order = []
+        while queue:
+            name = queue.popleft()
+            order.append(name)
+            for dependent in self._rev[name]:
+                if dependent in indegree:
+                    indegree[dependent] -= 1
+                    if indegree[dependent] == 0:
+                        queue.append(dependent)
         
-        for module_name in module_names:
-            resolve_module(module_name)
+        if len(order) != len(closure):
+            cycle = sorted(name for name, degree in indegree.items() if degree > 0)
+            raise ValueError(f"Circular dependency between modules: {', '.join(cycle)}")
         
-        return resolved
+        self._resolve_cache[key] = tuple(order)
+        return self._resolve_cache[key]
     
     def list_modules(self):
         """Lists available modules"""
@@ -180,6 +313,10 @@ class ModularBuildSystem:
     
     def get_compiler_command(self, compiler: str, build_type: str) -> List[str]:
         """Forms compiler command"""
+        key = (compiler, build_type)
+        if key in self._cmd_cache:
+            return list(self._cmd_cache[key])
+        
         if compiler not in self.compilers:
             raise ValueError(f"Unknown compiler: {compiler}")
         
@@ -188,139 +325,615 @@ class ModularBuildSystem:
         cmd.extend(comp_info['flags'])
         
         # Build flags
-        if build_type == 'debug':
-            if compiler == 'cl':
-                cmd.extend(['/Od', '/Zi', '/MDd'])
-            else:
-                cmd.extend(['-g', '-O0'])
-        elif build_type == 'release':
-            if compiler == 'cl':
-                cmd.extend(['/O2', '/MD', '/DNDEBUG'])
-            else:
-                cmd.extend(['-O2', '-DNDEBUG'])
+        cmd.extend(comp_info['build_flags'].get(build_type, []))
+        
+        # Flags not every compiler version knows, e.g. -fno-plt (calls go
+        # through the GOT instead of PLT stubs); -pipe in the base flags
+        # keeps intermediate files of a compile out of the temp directory
+        for flag in comp_info['optional_flags'].get(build_type, []):
+            if self._supports_flag(compiler, flag):
+                cmd.append(flag)
         
+        self._cmd_cache[key] = tuple(cmd)
         return cmd
     
-    def collect_sources(self, modules: Set[str]) -> List[Path]:
+    def _supports_flag(self, compiler: str, flag: str) -> bool:
+        """Checks once whether the compiler accepts a flag"""
+        key = (compiler, flag)
+        if key not in self._flag_support:
+            probe = [self.compilers[compiler]['command'], '-Werror', flag,
+                     '-x', 'c++', '-c', '-', '-o', os.devnull]
+            try:
+                result = subprocess.run(probe, input=b'int x;\n', stdout=subprocess.DEVNULL,
+                                        stderr=subprocess.DEVNULL)
+                self._flag_support[key] = result.returncode == 0
+            except OSError:
+                self._flag_support[key] = False
+        return self._flag_support[key]
+    
+    def collect_sources(self, modules: Tuple[str, ...]) -> List[Path]:
         """Collects source files for modules"""
+        key = tuple(modules)
+        if key in self._sources_cache:
+            return self._sources_cache[key]
+        
         sources = []
         
         for module_name in modules:
             module = self.modules[module_name]
             for src in module['sources']:
                 src_path = self.src_dir / src
-                if src_path.exists():
+                if src in self._src_index:
                     sources.append(src_path)
                 else:
                     print(colorize(f"Warning: file {src_path} not found", Colors.YELLOW))
         
+        self._sources_cache[key] = sources
         return sources
     
-    def collect_defines(self, modules: Set[str]) -> List[str]:
+    def collect_defines(self, modules: Tuple[str, ...]) -> List[str]:
         """Collects preprocessor macros for modules"""
+        key = tuple(modules)
+        if key in self._defines_cache:
+            return self._defines_cache[key]
+        
         defines = []
         
         for module_name in modules:
             module = self.modules[module_name]
             defines.extend(module['defines'])
         
+        self._defines_cache[key] = defines
         return defines
     
-    def build_library(self, modules: Set[str], compiler: str, build_type: str) -> bool:
-        """Compiles the library"""
-        print(colorize(f"Building library with modules: {', '.join(sorted(modules))}", Colors.BOLD))
-        
-        # Create build directory
-        self.build_dir.mkdir(exist_ok=True)
+    def _write_response_file(self, rsp_file: Path, args: List[str],
+                             compiler: str) -> Tuple[str, bool]:
+        """Writes arguments to a response file, returns its content and whether it changed"""
+        # GCC, Clang and ar treat backslashes as escapes everywhere in an @file,
+        # cl only inside quotes, so only cl quoting depends on whitespace
+        def quote(arg: str) -> str:
+            if compiler != 'cl':
+                arg = arg.replace('\\', '\\\\').replace('"', '\\"')
+                if any(c.isspace() for c in arg):
+                    return '"' + arg + '"'
+                return arg
+            if not any(c.isspace() for c in arg):
+                return arg
+            return '"' + arg.replace('"', '\\"') + '"'
         
-        # Collect files
-        sources = self.collect_sources(modules)
-        defines = self.collect_defines(modules)
+        content = '\n'.join(quote(arg) for arg in args) + '\n'
         
-        if not sources:
-            print(colorize("No source files to compile", Colors.YELLOW))
-            return True
-        
-        # Form command
+        # Rewrite only on change so the file keeps its timestamp
+        rsp_file.parent.mkdir(parents=True, exist_ok=True)
+        if rsp_file.exists() and rsp_file.read_text() == content:
+            return content, False
+        rsp_file.write_text(content)
+        return content, True
+    
+    def _base_command(self, compiler: str, build_type: str, defines: List[str],
+                      rsp_file: Path) -> List[str]:
+        """Forms compiler command, passing module definitions and include paths in a response file"""
         cmd = self.get_compiler_command(compiler, build_type)
         
+        comp_info = self.compilers[compiler]
+        
         # Add definitions
-        for define in defines:
-            if compiler == 'cl':
-                cmd.append(f'/D{define}')
-            else:
-                cmd.append(f'-D{define}')
+        flags = [comp_info['define_fmt'].format(define) for define in defines]
         
         # Add include paths
+        flags.append(comp_info['include_fmt'].format(self.include_dir))
+        
+        content, _ = self._write_response_file(rsp_file, flags, compiler)
+        rsp_arg = f'@{rsp_file}'
+        self._response_files[rsp_arg] = content
+        cmd.append(rsp_arg)
+        return cmd
+    
+    def _precompile_header(self, base_cmd: List[str], compiler: str,
+                           pch_dir: Path) -> Optional[Tuple[List[str], List[str]]]:
+        """Precompiles core.hpp, returns the flags that use it and objects to link"""
+        header = self.include_dir / "badcpplib" / "core.hpp"
+        pch_dir.mkdir(parents=True, exist_ok=True)
+        
         if compiler == 'cl':
-            cmd.append(f'/I{self.include_dir}')
+            # MSVC builds the PCH from a stub TU whose object must be linked too
+            pch_file = pch_dir / "core.pch"
+            stub = pch_dir / "core_pch.cpp"
+            stub_obj = pch_dir / "core_pch.obj"
+            if not stub.exists():
+                stub.write_text('#include "badcpplib/core.hpp"\n')
+            cmd = base_cmd + ['/Ycbadcpplib/core.hpp', f'/Fp{pch_file}', f'/Fo{stub_obj}',
+                              '/c', str(stub)]
+            flags = ['/Yubadcpplib/core.hpp', '/FIbadcpplib/core.hpp', f'/Fp{pch_file}']
+            self._pch_inputs[flags[-1]] = str(pch_file)
+            objects = [str(stub_obj)]
         else:
-            cmd.append(f'-I{self.include_dir}')
+            # GCC and Clang pick up <header>.gch/.pch next to an -include path;
+            # the stub there forwards to core.hpp when the PCH is rejected
+            pch_file = pch_dir / "badcpplib" / f"core.hpp{self.compilers[compiler]['pch_ext']}"
+            stub = pch_dir / "badcpplib" / "core.hpp"
+            stub_content = f'#include "{header}"\n'
+            stub.parent.mkdir(parents=True, exist_ok=True)
+            if not stub.exists() or stub.read_text() != stub_content:
+                stub.write_text(stub_content)
+            cmd = base_cmd + ['-x', 'c++-header', str(header), '-o', str(pch_file)]
+            flags = ['-Winvalid-pch', '-include', str(stub)]
+            self._pch_inputs[flags[-1]] = str(pch_file)
+            objects = []
         
-        # Add source files
-        cmd.extend([str(src) for src in sources])
+        # Rebuild when the command, the response file or a header it
+        # included changed
+        stamp = pch_dir / "pch.json"
+        command = [self._response_files.get(arg, arg) for arg in cmd]
+        try:
+            record = json.loads(stamp.read_text())
+        except (OSError, ValueError):
+            record = {}
+        current = (pch_file.exists() and record.get('command') == command and
+                   all(self._file_signature(path) == sig
+                       for path, sig in record.get('headers', {}).items()))
         
-        # Output file
-        output_file = self.build_dir / f"libbadcpplib.{'lib' if compiler == 'cl' else 'a'}"
+        if not current:
+            record = {}
+            print("Precompiling core.hpp...")
+            stamp.unlink(missing_ok=True)
+            pch_file.parent.mkdir(parents=True, exist_ok=True)
+            depfile = str(pch_file) + self.compilers[compiler]['depfile_ext']
+            returncode, output = self._run_compile(
+                cmd + [arg.format(depfile) for arg in self.compilers[compiler]['depfile_flags']])
+            if returncode != 0:
+                print(colorize("Precompiled header error:", Colors.RED))
+                print(output.decode(errors='replace'))
+                return None
+            self._objects_changed = True
+            
+            headers = self._read_depfile(depfile, compiler)
+            if headers is not None:
+                headers = [str(header)] + headers
+                record = {
+                    'command': command,
+                    'headers': {path: self._file_signature(path) for path in headers}
+                }
+                stamp.write_text(json.dumps(record))
+        
+        # Objects depend on what the PCH was built from rather than on its
+        # timestamp, which changes whenever another configuration rebuilds it
+        if record:
+            self._pch_keys[str(pch_file)] = hashlib.sha256(
+                json.dumps(record, sort_keys=True).encode()).hexdigest()
+        else:
+            self._pch_keys.pop(str(pch_file), None)
+        
+        return flags, objects
+    
+    def _tu_key(self, src: Path, cmd: List[str]) -> str:
+        """Cache key of a translation unit: source and command line"""
+        digest = hashlib.sha256()
+        digest.update(src.read_bytes())
+        # Modules resolve in a fixed order, so the command line is stable;
+        # response files are hashed by content rather than by path
+        digest.update('\0'.join(self._response_files.get(arg, arg) for arg in cmd).encode())
+        return digest.hexdigest()
+    
+    def _object_key(self, tu_key: str, headers: List[str]) -> Optional[str]:
+        """Cache key of an object: translation unit and the headers it included"""
+        digest = hashlib.sha256(tu_key.encode())
+        for header in headers:
+            if header in self._pch_keys:
+                digest.update(f"{header}:{self._pch_keys[header]}\0".encode())
+                continue
+            if header not in self._header_sigs:
+                self._header_sigs[header] = self._file_signature(header)
+            sig = self._header_sigs[header]
+            if sig is None:
+                return None
+            digest.update(f"{header}:{sig[0]}:{sig[1]}\0".encode())
+        return digest.hexdigest()
+    
+    @staticmethod
+    def _read_depfile(depfile: str, compiler: str) -> Optional[List[str]]:
+        """Lists the headers recorded in a compiler dependency file"""
+        try:
+            with open(depfile, encoding='utf-8', errors='replace') as f:
+                content = f.read()
+        except OSError:
+            return None
         
         if compiler == 'cl':
-            # Compile to object files
-            obj_files = []
+            # /sourceDependencies JSON
+            try:
+                return list(json.loads(content)['Data']['Includes'])
+            except (ValueError, KeyError, TypeError):
+                return None
+        
+        # Make rule "obj: source header...", with escaped spaces and
+        # backslash-newline continuations
+        _, _, prerequisites = content.replace('\\\n', ' ').partition(': ')
+        paths = [path.replace('\\ ', ' ') for path in re.findall(r'(?:\\ |\S)+', prerequisites)]
+        return paths[1:]
+    
+    def _jobs(self) -> int:
+        """Number of compiler processes to run at once"""
+        if self.jobs:
+            return self.jobs
+        # cpu_count() ignores affinity masks and cgroup CPU sets on Linux
+        try:
+            return max(1, len(os.sched_getaffinity(0)))
+        except AttributeError:
+            return os.cpu_count() or 4
+    
+    def _run_compile(self, cmd: List[str]) -> Tuple[int, bytes]:
+        """Runs a compiler or archiver, keeping only its diagnostics"""
+        # MSVC tools write diagnostics to stdout, GCC-style tools to stderr
+        msvc = Path(cmd[0]).stem.lower() in ('cl', 'lib')
+        process = subprocess.Popen(cmd,
+                                   stdout=subprocess.PIPE if msvc else subprocess.DEVNULL,
+                                   stderr=subprocess.STDOUT if msvc else subprocess.PIPE)
+        stream = process.stdout if msvc else process.stderr
+        output = stream.read()
+        stream.close()
+        return process.wait(), output
+    
+    def _compile_one(self, src: Path, base_cmd: List[str], compiler: str,
+                     obj_dir: str) -> Tuple[str, int, bytes]:
+        """Compiles one source file into an object file"""
+        comp_info = self.compilers[compiler]
+        suffix = comp_info['obj_ext']
+        obj_file = os.path.join(obj_dir, src.stem + suffix)
+        cmd = base_cmd + [comp_info['compile_flag'], str(src),
+                          comp_info['object_fmt'].format(obj_file)]
+        
+        # Reuse the object from an identical earlier compile; the manifest
+        # lists the headers this translation unit included last time
+        tu_key = self._tu_key(src, cmd)
+        manifest = os.path.join(self._cache_dir_str, tu_key + '.deps')
+        try:
+            with open(manifest) as f:
+                entry = json.load(f)
+            headers = list(entry['headers'])
+        except (OSError, ValueError, KeyError, TypeError):
+            entry, headers = {}, None
+        
+        obj_key = self._object_key(tu_key, headers) if headers is not None else None
+        cached = os.path.join(self._cache_dir_str, f"{obj_key}{suffix}")
+        if obj_key and os.path.exists(cached):
+            # The manifest's timestamp marks the entry as recently used
+            os.utime(manifest)
+            # copy2 keeps the timestamp, so a matching stat means the object
+            # already is this cache entry
+            if not (os.path.exists(obj_file) and filecmp.cmp(cached, obj_file)):
+                shutil.copy2(cached, obj_file)
+                self._objects_changed = True
+            return obj_file, 0, b''
+        
+        print(f"Compiling {src.name}...")
+        depfile = obj_file + comp_info['depfile_ext']
+        returncode, output = self._run_compile(
+            cmd + [arg.format(depfile) for arg in comp_info['depfile_flags']])
+        if returncode == 0:
+            self._objects_changed = True
+            headers = self._read_depfile(depfile, compiler)
+            if headers is not None:
+                # The precompiled header stands in for everything it includes
+                headers += [self._pch_inputs[arg] for arg in cmd if arg in self._pch_inputs]
+                obj_key = self._object_key(tu_key, headers)
+            if headers is not None and obj_key:
+                os.makedirs(self._cache_dir_str, exist_ok=True)
+                shutil.copy2(obj_file, os.path.join(self._cache_dir_str, obj_key + suffix))
+                # The object for the previous header state is superseded
+                stale = entry.get('object')
+                if stale and stale != obj_key + suffix:
+                    try:
+                        os.remove(os.path.join(self._cache_dir_str, stale))
+                    except OSError:
+                        pass
+                with open(manifest, 'w') as f:
+                    json.dump({'headers': headers, 'object': obj_key + suffix}, f)
+        return obj_file, returncode, output
+    
+    def _prune_cache(self):
+        """Drops the least recently used object cache entries over the limit"""
+        try:
+            with os.scandir(self._cache_dir_str) as entries:
+                manifests = [(entry.stat().st_mtime_ns, entry.path) for entry in entries
+                             if entry.name.endswith('.deps')]
+        except OSError:
+            return
+        
+        manifests.sort(reverse=True)
+        for _, manifest in manifests[self.cache_entries:]:
+            try:
+                with open(manifest) as f:
+                    obj_name = json.load(f).get('object')
+            except (OSError, ValueError, AttributeError):
+                obj_name = None
+            for path in (manifest, obj_name and os.path.join(self._cache_dir_str, obj_name)):
+                if path:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+    
+    def _compile_objects(self, sources: List[Path], base_cmd: List[str], compiler: str,
+                         obj_dir: Path) -> Optional[List[str]]:
+        """Compiles sources in parallel, returns object files in source order"""
+        if not sources:
+            return []
+        
+        obj_dir.mkdir(parents=True, exist_ok=True)
+        obj_dir_str = str(obj_dir)
+        
+        # Compilers that parallelize internally get all sources at once
+        comp_info = self.compilers[compiler]
+        if comp_info['batch_flag']:
             for src in sources:
-                obj_file = self.build_dir / f"{src.stem}.obj"
-                obj_cmd = cmd.copy()
-                obj_cmd.extend([f'/Fo{obj_file}', '/c', str(src)])
-                
                 print(f"Compiling {src.name}...")
-                result = subprocess.run(obj_cmd, capture_output=True, text=True)
-                if result.returncode != 0:
-                    print(colorize(f"Compilation error {src.name}:", Colors.RED))
-                    print(result.stderr)
-                    return False
-                obj_files.append(str(obj_file))
-            
-            # Create library
-            lib_cmd = ['lib', f'/OUT:{output_file}'] + obj_files
-        else:
-            # Compile object files one by one
-            obj_files = []
+            cmd = base_cmd + [comp_info['batch_flag'].format(self._jobs()), comp_info['compile_flag']]
+            cmd += [str(src) for src in sources]
+            cmd.append(comp_info['object_fmt'].format(os.path.join(obj_dir_str, '')))
+            returncode, output = self._run_compile(cmd)
+            if returncode != 0:
+                print(colorize("Compilation error:", Colors.RED))
+                print(output.decode(errors='replace'))
+                return None
+            self._objects_changed = True
+            return [os.path.join(obj_dir_str, src.stem + comp_info['obj_ext']) for src in sources]
+        
+        # One task per translation unit
+        workers = min(len(sources), self._jobs())
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {}
             for src in sources:
-                obj_file = self.build_dir / f"{src.stem}.o"
-                # Create separate command for each file
-                src_cmd = self.get_compiler_command(compiler, build_type)
-                
-                # Add definitions
-                for define in defines:
-                    src_cmd.append(f'-D{define}')
-                
-                # Add include paths
-                src_cmd.append(f'-I{self.include_dir}')
-                
-                # Compilation flags
-                src_cmd.extend(['-c', str(src), '-o', str(obj_file)])
-                
-                print(f"Compiling {src.name}...")
-                result = subprocess.run(src_cmd, capture_output=True, text=True)
-                if result.returncode != 0:
-                    print(colorize(f"Compilation error {src.name}:", Colors.RED))
-                    print(result.stderr)
-                    return False
-                obj_files.append(str(obj_file))
+                future = executor.submit(self._compile_one, src, base_cmd, compiler, obj_dir_str)
+                futures[future] = src
             
-            # Create archive
-            lib_cmd = ['ar', 'rcs', str(output_file)] + obj_files
+            obj_files = {}
+            for future in as_completed(futures):
+                src = futures[future]
+                obj_file, returncode, output = future.result()
+                if returncode != 0:
+                    print(colorize(f"Compilation error {src.name}:", Colors.RED))
+                    print(output.decode(errors='replace'))
+                    executor.shutdown(cancel_futures=True)
+                    return None
+                obj_files[src] = obj_file
+        
+        self._prune_cache()
+        
+        # Keep the archive member order stable
+        return [obj_files[src] for src in sources]
+    
+    @staticmethod
+    def _file_signature(path: str) -> Optional[List[int]]:
+        """Timestamp and size of a file, None if it is missing"""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return [st.st_mtime_ns, st.st_size]
+    
+    def _build_graph_is_current(self, key: str) -> bool:
+        """Checks the recorded build graph against the configuration key and the files"""
+        try:
+            graph = json.loads(self.graph_file.read_text())
+        except (OSError, ValueError):
+            return False
+        
+        # Truncated or older-format records mean a rebuild
+        if not isinstance(graph, dict) or graph.get('key') != key:
+            return False
+        files = graph.get('files')
+        if not isinstance(files, dict):
+            return False
+        
+        # Headers added since the last build are not in the record
+        headers = {str(header) for header in self.include_dir.rglob('*.hpp')}
+        if not headers.issubset(files):
+            return False
+        
+        return all(self._file_signature(path) == sig for path, sig in files.items())
+    
+    def _input_signatures(self, sources: List[Path]) -> Dict[str, Optional[List[int]]]:
+        """Signatures of the sources and headers a build reads"""
+        paths = [str(path) for path in sources]
+        paths.extend(str(header) for header in self.include_dir.rglob('*.hpp'))
+        return {path: self._file_signature(path) for path in paths}
+    
+    def _save_build_graph(self, key: str, inputs: Dict[str, Optional[List[int]]],
+                          outputs: List):
+        """Records the configuration key and the files of a finished build"""
+        files = dict(inputs)
+        files.update((str(path), self._file_signature(str(path))) for path in outputs)
+        graph = {
+            'key': key,
+            'files': files
+        }
+        
+        # Write atomically so an interrupted build cannot leave a broken record
+        tmp_file = self.graph_file.with_suffix('.tmp')
+        tmp_file.write_text(json.dumps(graph, indent=2))
+        os.replace(tmp_file, self.graph_file)
+    
+    def _build_library_direct(self, sources: List[Path], base_cmd: List[str], compiler: str,
+                              output_file: Path, extra_objs: List[str]) -> Optional[List[str]]:
+        """Compiles objects in the thread pool and archives them, returns the objects"""
+        obj_files = self._compile_objects(sources, base_cmd, compiler, self.build_dir)
+        if obj_files is None:
+            return None
+        obj_files += extra_objs
+        
+        # Pass the member list through a response file
+        members_changed = self._write_response_file(self.build_dir / "objects.rsp",
+                                                    obj_files, compiler)[1]
+        if output_file.exists() and not members_changed and not self._objects_changed:
+            print(colorize(f"Library is up to date: {output_file}", Colors.GREEN))
+            return obj_files
+        
+        # Create library; ar makes a thin archive that only references
+        # the objects, and appends to an existing one, so remove it first
+        output_file.unlink(missing_ok=True)
+        lib_cmd = [arg.format(output_file) for arg in self.compilers[compiler]['archiver']]
+        lib_cmd.append(f'@{self.build_dir / "objects.rsp"}')
         
         print("Creating library...")
-        result = subprocess.run(lib_cmd, capture_output=True, text=True)
-        if result.returncode != 0:
+        returncode, output = self._run_compile(lib_cmd)
+        if returncode != 0:
             print(colorize("Library creation error:", Colors.RED))
-            print(result.stderr)
-            return False
+            print(output.decode(errors='replace'))
+            return None
+        
+        print(colorize(f"Library created: {output_file}", Colors.GREEN))
+        return obj_files
+    
+    def _build_library_ninja(self, sources: List[Path], base_cmd: List[str], compiler: str,
+                             output_file: Path, extra_objs: List[str]) -> Optional[List[str]]:
+        """Writes build.ninja and compile_commands.json, runs Ninja, returns the objects"""
+        comp_info = self.compilers[compiler]
+        build_str = os.path.abspath(self.build_dir)
+        
+        def quote(arg: str) -> str:
+            # Ninja runs commands through the shell on POSIX, CreateProcess on Windows
+            arg = subprocess.list2cmdline([arg]) if os.name == 'nt' else shlex.quote(arg)
+            return arg.replace('$', '$$')
+        
+        def path(value: str) -> str:
+            return value.replace('$', '$$').replace(' ', '$ ').replace(':', '$:')
+        
+        # Ninja reads headers from compiler depfiles (GCC) or /showIncludes (MSVC)
+        if comp_info['ninja_deps'] == 'gcc':
+            dep_flags = [arg.format('$out.d') for arg in comp_info['depfile_flags']]
+            dep_lines = ['  depfile = $out.d', '  deps = gcc']
+        else:
+            dep_flags = ['/showIncludes']
+            dep_lines = ['  deps = msvc']
+        
+        compile_cmd = ' '.join([quote(arg) for arg in base_cmd] +
+                               [comp_info['compile_flag'], '$in',
+                                comp_info['object_fmt'].format('$out')] + dep_flags)
+        archive_cmd = ' '.join(arg.format('$out') if '{}' in arg else quote(arg)
+                               for arg in comp_info['archiver'])
+        
+        lines = [
+            '# Generated by modular_build.py, do not edit',
+            'ninja_required_version = 1.3',
+            '',
+            'rule cxx',
+            f'  command = {compile_cmd}',
+            *dep_lines,
+            '  description = Compiling $in',
+            '',
+            'rule ar',
+            f'  command = {archive_cmd} @$out.rsp',
+            '  rspfile = $out.rsp',
+            '  rspfile_content = $in',
+            '  description = Creating library',
+            ''
+        ]
+        
+        # Response files (rewritten only on change) and the precompiled header
+        # are inputs of every object
+        inputs = [arg[1:] for arg in base_cmd if arg in self._response_files]
+        inputs += [self._pch_inputs[arg] for arg in base_cmd if arg in self._pch_inputs]
+        implicit = ' | ' + ' '.join(path(item) for item in inputs) if inputs else ''
+        
+        obj_files = []
+        commands = []
+        for src in sources:
+            src_str = str(src)
+            obj_file = os.path.join(build_str, src.stem + comp_info['obj_ext'])
+            obj_files.append(obj_file)
+            lines.append(f'build {path(obj_file)}: cxx {path(src_str)}{implicit}')
+            commands.append({
+                'directory': build_str,
+                'file': src_str,
+                'arguments': base_cmd + [comp_info['compile_flag'], src_str,
+                                         comp_info['object_fmt'].format(obj_file)],
+                'output': obj_file
+            })
+        obj_files += extra_objs
+        
+        lines.append('')
+        lines.append(f"build {path(str(output_file))}: ar {' '.join(path(obj) for obj in obj_files)}")
+        lines.append(f'default {path(str(output_file))}')
+        
+        # ar appends to an existing archive, so drop it when members change
+        if self._write_response_file(self.build_dir / "objects.rsp", obj_files, compiler)[1]:
+            output_file.unlink(missing_ok=True)
+        
+        # Write atomically and only on change
+        for name, content in (('build.ninja', '\n'.join(lines) + '\n'),
+                              ('compile_commands.json', json.dumps(commands, indent=2))):
+            target = self.build_dir / name
+            if not target.exists() or target.read_text() != content:
+                tmp_file = target.with_suffix('.tmp')
+                tmp_file.write_text(content)
+                os.replace(tmp_file, target)
+        
+        result = subprocess.run(['ninja', '-C', build_str, '-j', str(self._jobs())])
+        if result.returncode != 0:
+            print(colorize("Ninja build failed", Colors.RED))
+            return None
         
         print(colorize(f"Library created: {output_file}", Colors.GREEN))
+        return obj_files
+    
+    def build_library(self, modules: Tuple[str, ...], compiler: str, build_type: str) -> bool:
+        """Compiles the library"""
+        print(colorize(f"Building library with modules: {', '.join(sorted(modules))}", Colors.BOLD))
+        
+        # Create build directory
+        self.build_dir.mkdir(exist_ok=True)
+        
+        # Collect files
+        sources = self.collect_sources(modules)
+        defines = self.collect_defines(modules)
+        
+        if not sources:
+            print(colorize("No source files to compile", Colors.YELLOW))
+            return True
+        
+        # Output file
+        output_file = self.build_dir / f"libbadcpplib{self.compilers[compiler]['lib_ext']}"
+        
+        # Nothing to do if the previous build had the same configuration and
+        # none of its files changed since
+        graph_key = hashlib.sha256(json.dumps({
+            'modules': sorted(modules),
+            'build_type': build_type,
+            'compiler': compiler
+        }).encode()).hexdigest()
+        if self._build_graph_is_current(graph_key):
+            print(colorize(f"Library is up to date: {output_file}", Colors.GREEN))
+            return True
+        
+        # Inputs are recorded as they were before compiling, so edits made
+        # during the build are picked up by the next one
+        inputs = self._input_signatures(sources)
+        
+        # Form command shared by all translation units
+        base_cmd = self._base_command(compiler, build_type, defines,
+                                      self.build_dir / "compile.rsp")
+        
+        # Precompile the header every translation unit starts with
+        self._objects_changed = False
+        pch = self._precompile_header(base_cmd, compiler, self.build_dir / "pch")
+        if pch is None:
+            return False
+        base_cmd = base_cmd + pch[0]
+        
+        # Compile object files and create the library; Ninja does both in
+        # one process when it is installed
+        if shutil.which('ninja'):
+            obj_files = self._build_library_ninja(sources, base_cmd, compiler, output_file, pch[1])
+        else:
+            obj_files = self._build_library_direct(sources, base_cmd, compiler, output_file, pch[1])
+        if obj_files is None:
+            return False
+        
+        self._save_build_graph(graph_key, inputs, obj_files + [output_file])
         return True
     
-    def build_tests(self, modules: Set[str], compiler: str, build_type: str) -> bool:
+    def build_tests(self, modules: Tuple[str, ...], compiler: str, build_type: str) -> bool:
         """Compiles and runs tests"""
         print(colorize("Building and running tests", Colors.BOLD))
         
@@ -328,15 +941,14 @@ class ModularBuildSystem:
         test_files = []
         
         # Basic test
-        basic_test = self.tests_dir / "basic_test.cpp"
-        if basic_test.exists():
-            test_files.append(basic_test)
+        if "basic_test.cpp" in self._test_index:
+            test_files.append(self.tests_dir / "basic_test.cpp")
         
         # Module tests
         for module_name in modules:
-            test_file = self.tests_dir / "modules" / f"test_{module_name}.cpp"
-            if test_file.exists():
-                test_files.append(test_file)
+            test_name = f"modules/test_{module_name}.cpp"
+            if test_name in self._test_index:
+                test_files.append(self.tests_dir / test_name)
         
         if not test_files:
             print(colorize("Test files not found", Colors.YELLOW))
@@ -345,49 +957,53 @@ class ModularBuildSystem:
         success_count = 0
         total_count = len(test_files)
         
-        for test_file in test_files:
-            print(f"\nTest: {colorize(test_file.name, Colors.CYAN)}")
-            
-            # Form compilation command
-            cmd = self.get_compiler_command(compiler, build_type)
-            
-            # Add definitions
-            defines = self.collect_defines(modules)
-            for define in defines:
-                if compiler == 'cl':
-                    cmd.append(f'/D{define}')
-                else:
-                    cmd.append(f'-D{define}')
-            
-            # Add include paths
-            if compiler == 'cl':
-                cmd.append(f'/I{self.include_dir}')
-            else:
-                cmd.append(f'-I{self.include_dir}')
-            
-            # Add source files (test + modules with sources)
-            cmd.append(str(test_file))
-            sources = self.collect_sources(modules)
-            cmd.extend([str(src) for src in sources])
-            
+        # Command and module objects are the same for every test, so build
+        # them once and link each test against the shared objects
+        base_cmd = self._base_command(compiler, build_type, self.collect_defines(modules),
+                                      self.build_dir / "test_objs" / "compile.rsp")
+        pch = self._precompile_header(base_cmd, compiler, self.build_dir / "test_objs" / "pch")
+        if pch is None:
+            return False
+        # Test sources are compiled without the PCH: basic_test.cpp uses the
+        # monolithic badcpplib.hpp, which clashes with core.hpp
+        shared_objs = self._compile_objects(self.collect_sources(modules), base_cmd + pch[0],
+                                            compiler, self.build_dir / "test_objs")
+        if shared_objs is None:
+            return False
+        shared_objs += pch[1]
+        
+        # Output naming is the same for every test
+        build_str = str(self.build_dir)
+        comp_info = self.compilers[compiler]
+        exe_suffix = comp_info['exe_ext']
+        
+        def compile_test(test_file: Path) -> Tuple[str, int, bytes]:
             # Output file
-            exe_name = test_file.stem + ('.exe' if compiler == 'cl' else '')
-            output_file = self.build_dir / exe_name
+            output_file = os.path.join(build_str, test_file.stem + exe_suffix)
             
-            if compiler == 'cl':
-                cmd.extend([f'/Fe{output_file}'])
-            else:
-                cmd.extend(['-o', str(output_file)])
+            # Form compilation command (test source + module objects)
+            cmd = base_cmd + [str(test_file)] + shared_objs
+            cmd.append(comp_info['exe_fmt'].format(output_file))
             
             # Compilation
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            if result.returncode != 0:
+            return (output_file,) + self._run_compile(cmd)
+        
+        # Test executables are independent, so compile them in parallel; they
+        # still run one at a time since tests may share files
+        workers = min(len(test_files), self._jobs())
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            compiled = list(executor.map(compile_test, test_files))
+        
+        for test_file, (output_file, returncode, output) in zip(test_files, compiled):
+            print(f"\nTest: {colorize(test_file.name, Colors.CYAN)}")
+            
+            if returncode != 0:
                 print(colorize(f"Test compilation error {test_file.name}:", Colors.RED))
-                print(result.stderr)
+                print(output.decode(errors='replace'))
                 continue
             
             # Run test
-            result = subprocess.run([str(output_file)], capture_output=True, text=True, 
+            result = subprocess.run([output_file], capture_output=True, text=True, 
                                   cwd=self.project_root)
             
             if result.returncode == 0:
@@ -429,10 +1045,14 @@ def main():
                        help='Run tests after build')
     parser.add_argument('--test-only', action='store_true',
                        help='Only run tests (without building library)')
+    parser.add_argument('--jobs', '-j', type=int, metavar='N',
+                       help='Parallel compiler processes (default: usable CPUs)')
     
     args = parser.parse_args()
     
     build_system = ModularBuildSystem()
+    if args.jobs:
+        build_system.jobs = max(1, args.jobs)
     
     if args.list_modules:
         build_system.list_modules()
@@ -450,7 +1070,7 @@ def main():
     
     try:
         # Resolve dependencies
-        resolved_modules = build_system.resolve_dependencies(list(modules_to_build))
+        resolved_modules = build_system.resolve_dependencies(tuple(sorted(modules_to_build)))
         
         print(colorize("Selected modules:", Colors.BOLD))
         for module in sorted(resolved_modules):
@@ -467,7 +1087,7 @@ def main():
         # Run tests
         if args.test or args.test_only:
             # Add test_framework to modules for testing
-            test_modules = resolved_modules | {'test_framework'}
+            test_modules = build_system.resolve_dependencies(resolved_modules + ('test_framework',))
             test_success = build_system.build_tests(test_modules, args.compiler, args.build_type)
             success = success and test_success
         